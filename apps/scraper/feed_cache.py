@@ -0,0 +1,25 @@
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+
+from apps.scraper import stats
+
+_KEY_TEMPLATE = 'scraper:feed:{pk}:{version}:{base_url}'
+
+
+def _key(feed, request):
+    # Representations contain absolute URLs, so they're only shared between requests made to the same host
+    base_url = md5(request.build_absolute_uri('/').encode()).hexdigest()
+    return _KEY_TEMPLATE.format(pk=feed.pk, version=feed.version, base_url=base_url)
+
+
+def get_or_set(feed, request, serialize):
+    key = _key(feed, request)
+    if (data := cache.get(key)) is not None:
+        stats.increment(stats.FEED_CACHE_HITS)
+        return data
+    stats.increment(stats.FEED_CACHE_MISSES)
+    data = serialize()
+    cache.set(key, data, timeout=settings.DIGICLOUD_FEED_CACHE_TIMEOUT.total_seconds())
+    return data
@@ -0,0 +1,61 @@
+import asyncio
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Iterable, List, Tuple, Union
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from apps.scraper import rss
+from apps.scraper.models import Feed
+
+FetchResult = Union[requests.Response, BaseException]
+
+
+def create_session() -> requests.Session:
+    # Keep-alive connections are pooled per host, so it's enough for a pool to hold as many connections as we allow
+    # concurrent requests to a single host
+    adapter = HTTPAdapter(
+        pool_connections=settings.DIGICLOUD_FETCH_CONCURRENCY,
+        pool_maxsize=settings.DIGICLOUD_FETCH_PER_HOST_CONCURRENCY,
+    )
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+async def _fetch_feed(feed: Feed, session, executor, host_semaphores) -> FetchResult:
+    async with host_semaphores[urlsplit(feed.url).netloc.lower()]:
+        return await asyncio.get_running_loop().run_in_executor(executor, partial(
+            rss.fetch_url,
+            feed.url,
+            etag=feed.etag,
+            last_modified=feed.last_modified,
+            session=session,
+        ))
+
+
+async def _fetch_feeds(feeds: List[Feed], session) -> List[FetchResult]:
+    host_semaphores = defaultdict(lambda: asyncio.Semaphore(settings.DIGICLOUD_FETCH_PER_HOST_CONCURRENCY))
+    # The size of the pool is what bounds the total number of requests in flight
+    with ThreadPoolExecutor(max_workers=settings.DIGICLOUD_FETCH_CONCURRENCY) as executor:
+        return await asyncio.gather(
+            *(_fetch_feed(feed, session, executor, host_semaphores) for feed in feeds),
+            return_exceptions=True,
+        )
+
+
+def fetch_feeds(feeds: Iterable[Feed]) -> List[Tuple[Feed, FetchResult]]:
+    """
+    Fetches the given feeds concurrently, and returns each feed along with either its response or the exception
+    raised while fetching it. Nothing touches the database here, so the results can safely be handed over to
+    `Feed.update_items` afterwards.
+    """
+    feeds = list(feeds)
+    with create_session() as session:
+        results = asyncio.run(_fetch_feeds(feeds, session))
+    return list(zip(feeds, results))
@@ -0,0 +1,29 @@
+from rest_framework.filters import BaseFilterBackend
+
+from apps.scraper.serializers import ItemFilterSerializer
+
+
+class ItemFilterBackend(BaseFilterBackend):
+    """
+    Filters the items by `?feed=<id>`, by publication date with `?since=` and `?until=` (both inclusive, ISO 8601),
+    and to the unread or bookmarked ones with `?unread=true` and `?bookmarked=true`, so that clients can sync
+    incrementally instead of fetching the whole timeline.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        serializer = ItemFilterSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        filters = serializer.validated_data
+        date_field = view.get_date_field()
+
+        if (feed := filters.get('feed')) is not None:
+            queryset = queryset.filter(feed=feed)
+        if (since := filters.get('since')) is not None:
+            queryset = queryset.filter(**{f'{date_field}__gte': since})
+        if (until := filters.get('until')) is not None:
+            queryset = queryset.filter(**{f'{date_field}__lte': until})
+        if filters.get('unread'):
+            queryset = queryset.unread(request.user)
+        if filters.get('bookmarked'):
+            queryset = queryset.bookmarks(request.user)
+        return queryset
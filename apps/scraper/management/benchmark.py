@@ -0,0 +1,16 @@
+import statistics
+import time
+
+
+def measure(function, repeat):
+    result = function()  # Warm up the caches first
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return result, timings
+
+
+def format_timings(timings):
+    return f'median {statistics.median(timings) * 1000:.1f} ms, best {min(timings) * 1000:.1f} ms'
@@ -0,0 +1,43 @@
+from functools import partial
+
+from django.core.management import BaseCommand
+from django.db import transaction
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.scraper.management.benchmark import measure, format_timings
+from apps.scraper.models import Feed, Item
+from apps.scraper.serializers import FeedSerializer
+
+_BATCH_SIZE = 5000
+
+
+def _serialize(feed_pk, request):
+    return FeedSerializer(Feed.objects.get(pk=feed_pk), context={'request': request}).data
+
+
+class Command(BaseCommand):
+    help = 'Compares the default and the full feed representations on a generated feed, which is rolled back afterwards'
+
+    def add_arguments(self, parser):
+        parser.add_argument('size', nargs='?', type=int, default=50_000, help='Number of items in the feed')
+        parser.add_argument('--repeat', type=int, default=5, help='Number of timed runs per representation')
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory(SERVER_NAME='localhost')
+        requests = {
+            'default': Request(factory.get('/api/feeds/')),
+            'include=items': Request(factory.get('/api/feeds/', {'include': 'items'})),
+        }
+        with transaction.atomic():
+            feed = Feed.objects.create(url='https://benchmark.digicloud.ir', title='', link='', description='')
+            for start in range(0, options['size'], _BATCH_SIZE):
+                Item.objects.bulk_create([
+                    Item(feed=feed, link=f'https://benchmark.digicloud.ir/items/{i}')
+                    for i in range(start, min(start + _BATCH_SIZE, options['size']))
+                ])
+
+            for name, request in requests.items():
+                _, timings = measure(partial(_serialize, feed.pk, request), options['repeat'])
+                self.stdout.write(f'{options["size"]} items, {name}: {format_timings(timings)}')
+            transaction.set_rollback(True)
@@ -0,0 +1,61 @@
+from functools import partial
+
+from django.core.management import BaseCommand
+from django.db import transaction, connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.authentication.models import User
+from apps.scraper.management.benchmark import measure, format_timings
+from apps.scraper.models import Item, Feed, Subscription, Interaction
+from apps.scraper.serializers import ItemSerializer
+
+
+def _list(queryset, size, request):
+    return ItemSerializer(queryset.order_by('-pubDate')[:size], many=True, context={'request': request}).data
+
+
+class Command(BaseCommand):
+    help = 'Compares reading the user interactions of an item page by prefetching and by annotating them, on ' \
+           'generated data which is rolled back afterwards'
+
+    def add_arguments(self, parser):
+        parser.add_argument('sizes', nargs='*', type=int, default=[20, 100, 500], help='Page sizes to benchmark with')
+        parser.add_argument('--read-ratio', type=float, default=0.5, help='Ratio of items the user has seen')
+        parser.add_argument('--repeat', type=int, default=20, help='Number of timed runs per implementation')
+
+    def handle(self, *args, **options):
+        request = Request(APIRequestFactory(SERVER_NAME='localhost').get('/api/items/'))
+        with transaction.atomic():
+            user = self._generate(max(options['sizes']), options['read_ratio'])
+            items = Item.objects.filter(feed__users__in=[user])
+            implementations = {
+                'prefetch': items.with_user_interactions(user),
+                'annotations': items.with_user_annotations(user),
+            }
+            for size in options['sizes']:
+                for name, queryset in implementations.items():
+                    page = partial(_list, queryset, size, request)
+                    with CaptureQueriesContext(connection) as queries:
+                        page()
+                    _, timings = measure(page, options['repeat'])
+                    self.stdout.write(f'{size} items, {name}: {len(queries)} queries, {format_timings(timings)}')
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def _generate(size, read_ratio):
+        user = User.objects.create_user(username='item-list-benchmark', email='benchmark@digicloud.ir')
+        feed = Feed.objects.create(url='https://benchmark.digicloud.ir', title='', link='', description='')
+        Subscription.objects.create(user=user, feed=feed)
+        items = Item.objects.bulk_create([
+            Item(feed=feed, link=f'https://benchmark.digicloud.ir/items/{i}') for i in range(size)
+        ])
+
+        read_step = round(1 / read_ratio) if read_ratio else 0
+        if read_step:
+            item_pks = Item.objects.filter(feed=feed).values_list('pk', flat=True)
+            Interaction.objects.bulk_create([
+                Interaction(user=user, item_id=item_pk) for item_pk in item_pks[::read_step]
+            ])
+        return user
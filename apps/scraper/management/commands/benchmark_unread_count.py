@@ -0,0 +1,70 @@
+from functools import partial
+
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from apps.authentication.models import User
+from apps.scraper.management.benchmark import measure, format_timings
+from apps.scraper.models import Item, Feed, Subscription, Interaction
+
+_FEED_COUNT = 10
+_BATCH_SIZE = 5000
+
+
+def _two_counts_unread_item_count(user):
+    # The implementation that `ItemQuerySet.unread_item_count` replaced, kept here as the baseline
+    all_query = Item.objects.filter(feed__subscription__user=user)
+    read_query = all_query.filter(interactions__user=user)
+    return all_query.count() - read_query.count()
+
+
+class Command(BaseCommand):
+    help = 'Compares the unread item count implementations on generated data, which is rolled back afterwards'
+
+    def add_arguments(self, parser):
+        parser.add_argument('sizes', nargs='*', type=int, default=[10_000, 100_000, 1_000_000],
+                            help='Numbers of items per user to benchmark with')
+        parser.add_argument('--read-ratio', type=float, default=0.5, help='Ratio of items the user has seen')
+        parser.add_argument('--repeat', type=int, default=5, help='Number of timed runs per implementation')
+
+    def handle(self, *args, **options):
+        implementations = {
+            'two counts': _two_counts_unread_item_count,
+            'not exists': Item.objects.unread_item_count,
+        }
+        for size in options['sizes']:
+            with transaction.atomic():
+                user = self._generate(size, options['read_ratio'])
+                for name, implementation in implementations.items():
+                    count, timings = measure(partial(implementation, user), options['repeat'])
+                    self.stdout.write(f'{size} items, {name}: {count} unread, {format_timings(timings)}')
+                transaction.set_rollback(True)
+
+    @staticmethod
+    def _generate(size, read_ratio):
+        user = User.objects.create_user(username='unread-count-benchmark', email='benchmark@digicloud.ir')
+        feeds = [
+            Feed.objects.create(url=f'https://benchmark.digicloud.ir/{i}', title='', link='', description='')
+            for i in range(_FEED_COUNT)
+        ]
+        for feed in feeds:
+            Subscription.objects.create(user=user, feed=feed)
+
+        for start in range(0, size, _BATCH_SIZE):
+            Item.objects.bulk_create([
+                Item(feed=feeds[i % _FEED_COUNT], link=f'https://benchmark.digicloud.ir/items/{i}')
+                for i in range(start, min(start + _BATCH_SIZE, size))
+            ])
+
+        read_step = round(1 / read_ratio) if read_ratio else 0
+        if read_step:
+            read_item_pks = Item.objects.filter(feed__in=feeds).values_list('pk', flat=True)
+            batch = []
+            for i, item_pk in enumerate(read_item_pks.iterator()):
+                if i % read_step == 0:
+                    batch.append(Interaction(user=user, item_id=item_pk))
+                if len(batch) == _BATCH_SIZE:
+                    Interaction.objects.bulk_create(batch)
+                    batch = []
+            Interaction.objects.bulk_create(batch)
+        return user
@@ -0,0 +1,26 @@
+from django.core.management import BaseCommand
+
+from apps.scraper import stats
+
+
+class Command(BaseCommand):
+    help = 'Shows how many feed representations were served from the cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Reset the counters after showing them')
+
+    def handle(self, *args, **options):
+        counters = (
+            stats.FEED_CACHE_HITS,
+            stats.FEED_CACHE_MISSES,
+        )
+        values = {name: stats.get(name) for name in counters}
+        total = sum(values.values())
+
+        for name, value in values.items():
+            self.stdout.write(f'{name}: {value}')
+        self.stdout.write(f'hit rate: {values[stats.FEED_CACHE_HITS] / total:.2%}' if total else 'hit rate: -')
+
+        if options['reset']:
+            for name in counters:
+                stats.reset(name)
@@ -0,0 +1,28 @@
+from django.core.management import BaseCommand
+
+from apps.scraper import stats
+
+
+class Command(BaseCommand):
+    help = 'Shows how many feed updates were processed and how many were skipped because nothing had changed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Reset the counters after showing them')
+
+    def handle(self, *args, **options):
+        counters = (
+            stats.FEED_UPDATES_PROCESSED,
+            stats.FEED_UPDATES_NOT_MODIFIED,
+            stats.FEED_UPDATES_UNCHANGED,
+        )
+        values = {name: stats.get(name) for name in counters}
+        total = sum(values.values())
+        skipped = values[stats.FEED_UPDATES_NOT_MODIFIED] + values[stats.FEED_UPDATES_UNCHANGED]
+
+        for name, value in values.items():
+            self.stdout.write(f'{name}: {value}')
+        self.stdout.write(f'skip rate: {skipped / total:.2%}' if total else 'skip rate: -')
+
+        if options['reset']:
+            for name in counters:
+                stats.reset(name)
@@ -0,0 +1,24 @@
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from apps.scraper.models import Subscription, TimelineEntry, Item
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the timeline entries of users from their subscriptions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('usernames', nargs='*', help='Only rebuild the timelines of these users')
+
+    def handle(self, *args, **options):
+        subscriptions = Subscription.objects.order_by('user')
+        entries = TimelineEntry.objects.all()
+        if options['usernames']:
+            subscriptions = subscriptions.filter(user__username__in=options['usernames'])
+            entries = entries.filter(user__username__in=options['usernames'])
+
+        with transaction.atomic():
+            entries.delete()
+            for subscription in subscriptions.iterator():
+                TimelineEntry.objects.add_items([subscription.user_id], Item.objects.filter(feed=subscription.feed_id))
+        self.stdout.write('Rebuilt the timelines')
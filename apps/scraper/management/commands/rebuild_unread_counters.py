@@ -0,0 +1,23 @@
+from django.core.management import BaseCommand
+
+from apps.authentication.models import User
+from apps.scraper import unread
+from apps.scraper.models import Item
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the cached unread item counters of users from the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('usernames', nargs='*', help='Only rebuild the counters of these users')
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(subscription__isnull=False).distinct()
+        if options['usernames']:
+            users = users.filter(username__in=options['usernames'])
+
+        rebuilt_count = 0
+        for user in users.iterator():
+            unread.store(user.pk, Item.objects.unread_item_count(user), overwrite=True)
+            rebuilt_count += 1
+        self.stdout.write(f'Rebuilt the unread counters of {rebuilt_count} users')
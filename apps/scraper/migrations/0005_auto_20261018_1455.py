@@ -0,0 +1,23 @@
+# Generated by Django 3.2.6 on 2026-10-18 14:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0004_auto_20210815_2240'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feed',
+            name='etag',
+            field=models.TextField(blank=True, null=True, verbose_name='etag'),
+        ),
+        migrations.AddField(
+            model_name='feed',
+            name='last_modified',
+            field=models.TextField(blank=True, null=True, verbose_name='last modified'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.6 on 2026-10-18 14:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0005_auto_20261018_1455'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feed',
+            name='content_digest',
+            field=models.CharField(blank=True, max_length=64, null=True, verbose_name='content digest'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.6 on 2026-10-18 14:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0006_feed_content_digest'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['feed', 'link'], name='scraper_ite_feed_id_04e5f7_idx'),
+        ),
+    ]
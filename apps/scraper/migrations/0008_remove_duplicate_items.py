@@ -0,0 +1,31 @@
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def remove_duplicate_items(apps, schema_editor):
+    Item = apps.get_model('scraper', 'Item')
+    Interaction = apps.get_model('scraper', 'Interaction')
+
+    duplicates = Item.objects\
+        .filter(link__isnull=False)\
+        .values('feed', 'link')\
+        .annotate(count=Count('id'), kept_id=Min('id'))\
+        .filter(count__gt=1)
+    for duplicate in duplicates:
+        redundant_items = Item.objects\
+            .filter(feed=duplicate['feed'], link=duplicate['link'])\
+            .exclude(pk=duplicate['kept_id'])
+        # Interactions can't be deleted along with the items, so they are moved to the copy that is kept
+        Interaction.objects.filter(item__in=redundant_items).update(item_id=duplicate['kept_id'])
+        redundant_items.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0007_item_scraper_ite_feed_id_04e5f7_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_items, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.6 on 2026-10-18 14:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0008_remove_duplicate_items'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='item',
+            name='scraper_ite_feed_id_04e5f7_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='item',
+            constraint=models.UniqueConstraint(fields=('feed', 'link'), name='unique_feed_item_link'),
+        ),
+    ]
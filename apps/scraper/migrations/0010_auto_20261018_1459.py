@@ -0,0 +1,23 @@
+# Generated by Django 3.2.6 on 2026-10-18 14:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0009_auto_20261018_1457'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feed',
+            name='next_update_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='next update at'),
+        ),
+        migrations.AddField(
+            model_name='feed',
+            name='update_interval',
+            field=models.DurationField(blank=True, null=True, verbose_name='update interval'),
+        ),
+    ]
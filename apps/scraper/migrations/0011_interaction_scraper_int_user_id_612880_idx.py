@@ -0,0 +1,17 @@
+# Generated by Django 3.2.6 on 2026-10-18 15:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0010_auto_20261018_1459'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='interaction',
+            index=models.Index(fields=['user', 'item'], name='scraper_int_user_id_612880_idx'),
+        ),
+    ]
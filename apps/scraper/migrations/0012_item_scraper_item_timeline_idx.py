@@ -0,0 +1,17 @@
+# Generated by Django 3.2.6 on 2026-10-18 15:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0011_interaction_scraper_int_user_id_612880_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['-pubDate', '-id'], name='scraper_item_timeline_idx'),
+        ),
+    ]
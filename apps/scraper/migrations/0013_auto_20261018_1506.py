@@ -0,0 +1,34 @@
+# Generated by Django 3.2.6 on 2026-10-18 15:06
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('scraper', '0012_item_scraper_item_timeline_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pubDate', models.DateTimeField(blank=True, null=True, verbose_name='web pubDate')),
+                ('feed', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='scraper.feed', verbose_name='feed')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to='scraper.item', verbose_name='item')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to=settings.AUTH_USER_MODEL, verbose_name='user')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['user', '-pubDate', '-item'], name='scraper_timeline_user_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='timelineentry',
+            constraint=models.UniqueConstraint(fields=('user', 'item'), name='unique_timeline_entry'),
+        ),
+    ]
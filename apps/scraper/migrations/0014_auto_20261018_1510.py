@@ -0,0 +1,21 @@
+# Generated by Django 3.2.6 on 2026-10-18 15:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0013_auto_20261018_1506'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='interaction',
+            index=models.Index(condition=models.Q(('date_bookmarked__isnull', False)), fields=['user', 'item'], name='scraper_interaction_bkmk_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['feed', '-pubDate', '-id'], name='scraper_item_feed_idx'),
+        ),
+    ]
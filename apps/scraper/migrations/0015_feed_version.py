@@ -0,0 +1,18 @@
+# Generated by Django 3.2.6 on 2026-10-18 15:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0014_auto_20261018_1510'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feed',
+            name='version',
+            field=models.PositiveIntegerField(default=0, verbose_name='version'),
+        ),
+    ]
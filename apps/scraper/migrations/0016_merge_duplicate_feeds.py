@@ -0,0 +1,60 @@
+from django.db import migrations
+
+from apps.scraper.normalization import normalize_url
+
+
+def _merge_feed(apps, redundant_feed, kept_feed):
+    Item = apps.get_model('scraper', 'Item')
+    Interaction = apps.get_model('scraper', 'Interaction')
+    Subscription = apps.get_model('scraper', 'Subscription')
+    TimelineEntry = apps.get_model('scraper', 'TimelineEntry')
+    PeriodicTask = apps.get_model('django_celery_beat', 'PeriodicTask')
+
+    kept_item_pks = dict(Item.objects.filter(feed=kept_feed, link__isnull=False).values_list('link', 'pk'))
+    moved_item_pks = []
+    for item_pk, link in Item.objects.filter(feed=redundant_feed).values_list('pk', 'link'):
+        if (kept_item_pk := kept_item_pks.get(link)) is None:
+            moved_item_pks.append(item_pk)
+            continue
+        # Interactions can't be deleted along with the items, so they are moved to the copy that is kept. Timeline
+        # entries of the deleted copies are lost, `rebuild_timelines` restores them.
+        Interaction.objects.filter(item=item_pk).update(item_id=kept_item_pk)
+        Item.objects.filter(pk=item_pk).delete()
+    Item.objects.filter(pk__in=moved_item_pks).update(feed=kept_feed)
+    TimelineEntry.objects.filter(feed=redundant_feed).update(feed=kept_feed)
+
+    Subscription.objects\
+        .filter(feed=redundant_feed, user__in=Subscription.objects.filter(feed=kept_feed).values('user'))\
+        .delete()
+    Subscription.objects.filter(feed=redundant_feed).update(feed=kept_feed)
+
+    periodic_task_id = redundant_feed.periodic_task_id
+    redundant_feed.delete()
+    if periodic_task_id is not None:
+        PeriodicTask.objects.filter(pk=periodic_task_id).delete()
+
+
+def merge_duplicate_feeds(apps, schema_editor):
+    Feed = apps.get_model('scraper', 'Feed')
+
+    kept_feeds = {}
+    for feed in Feed.objects.order_by('pk'):
+        url = normalize_url(feed.url)
+        if (kept_feed := kept_feeds.get(url)) is not None:
+            _merge_feed(apps, feed, kept_feed)
+            continue
+        kept_feeds[url] = feed
+        if feed.url != url:
+            feed.url = url
+            feed.save(update_fields=['url'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0015_feed_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_feeds, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.6 on 2026-10-18 15:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0016_merge_duplicate_feeds'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='feed',
+            name='url',
+            field=models.URLField(unique=True, verbose_name='url'),
+        ),
+    ]
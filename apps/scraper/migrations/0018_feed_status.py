@@ -0,0 +1,18 @@
+# Generated by Django 3.2.6 on 2026-10-18 15:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0017_alter_feed_url'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feed',
+            name='status',
+            field=models.CharField(choices=[('pending', 'pending'), ('active', 'active'), ('failed', 'failed')], default='active', max_length=16, verbose_name='status'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 3.2.6 on 2026-10-18 15:17
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0018_feed_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedAlias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('canonical_url', models.CharField(max_length=2048, unique=True, verbose_name='canonical url')),
+                ('feed', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='scraper.feed', verbose_name='feed')),
+            ],
+        ),
+    ]
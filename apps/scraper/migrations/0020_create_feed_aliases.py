@@ -0,0 +1,33 @@
+from importlib import import_module
+
+from django.db import migrations
+
+from apps.scraper.normalization import canonicalize_url
+
+# Feeds that only differ by their canonical URL are merged the same way as the ones differing by their normalized URL
+_merge_feed = import_module('apps.scraper.migrations.0016_merge_duplicate_feeds')._merge_feed
+
+
+def create_feed_aliases(apps, schema_editor):
+    Feed = apps.get_model('scraper', 'Feed')
+    FeedAlias = apps.get_model('scraper', 'FeedAlias')
+
+    kept_feeds = {}
+    for feed in Feed.objects.order_by('pk'):
+        canonical_url = canonicalize_url(feed.url)
+        if (kept_feed := kept_feeds.get(canonical_url)) is not None:
+            _merge_feed(apps, feed, kept_feed)
+            continue
+        kept_feeds[canonical_url] = feed
+        FeedAlias.objects.create(canonical_url=canonical_url, feed=feed)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0019_feedalias'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_feed_aliases, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.6 on 2026-10-18 15:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0020_create_feed_aliases'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feed',
+            name='last_published_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='last published at'),
+        ),
+        migrations.AddField(
+            model_name='feed',
+            name='publish_interval',
+            field=models.DurationField(blank=True, null=True, verbose_name='publish interval'),
+        ),
+    ]
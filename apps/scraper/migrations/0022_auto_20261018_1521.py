@@ -0,0 +1,28 @@
+# Generated by Django 3.2.6 on 2026-10-18 15:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0021_auto_20261018_1519'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feed',
+            name='not_before',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='not before'),
+        ),
+        migrations.AddField(
+            model_name='feed',
+            name='skipDays',
+            field=models.JSONField(default=list, verbose_name='skip days'),
+        ),
+        migrations.AddField(
+            model_name='feed',
+            name='skipHours',
+            field=models.JSONField(default=list, verbose_name='skip hours'),
+        ),
+    ]
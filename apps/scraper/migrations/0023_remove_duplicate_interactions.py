@@ -0,0 +1,36 @@
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def remove_duplicate_interactions(apps, schema_editor):
+    Interaction = apps.get_model('scraper', 'Interaction')
+
+    duplicates = Interaction.objects\
+        .values('user', 'item')\
+        .annotate(count=Count('id'), kept_id=Min('id'))\
+        .filter(count__gt=1)
+    for duplicate in duplicates:
+        kept_interaction = Interaction.objects.get(pk=duplicate['kept_id'])
+        redundant_interactions = Interaction.objects\
+            .filter(user=duplicate['user'], item=duplicate['item'])\
+            .exclude(pk=duplicate['kept_id'])\
+            .order_by('pk')
+        # The bookmark and the comment may have ended up on any of the copies, so the kept one takes them over
+        for interaction in redundant_interactions:
+            if kept_interaction.date_bookmarked is None:
+                kept_interaction.date_bookmarked = interaction.date_bookmarked
+            if not kept_interaction.comment:
+                kept_interaction.comment = interaction.comment
+        kept_interaction.save(update_fields=['date_bookmarked', 'comment'])
+        redundant_interactions.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0022_auto_20261018_1521'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_interactions, migrations.RunPython.noop),
+    ]
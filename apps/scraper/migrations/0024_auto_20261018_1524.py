@@ -0,0 +1,21 @@
+# Generated by Django 3.2.6 on 2026-10-18 15:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0023_remove_duplicate_interactions'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='interaction',
+            name='scraper_int_user_id_612880_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='interaction',
+            constraint=models.UniqueConstraint(fields=('user', 'item'), name='unique_user_item_interaction'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.6 on 2026-10-18 15:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0024_auto_20261018_1524'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subscription',
+            name='read_until',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='read until'),
+        ),
+    ]
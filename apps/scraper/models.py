@@ -1,42 +1,91 @@
 import json
-from datetime import timedelta
+from datetime import timedelta, timezone
+from functools import partial
+from http import HTTPStatus
+from itertools import islice
 
 from django.conf import settings
-from django.db import models
-from django.db.models import Prefetch
+from django.db import models, transaction, connection, IntegrityError
+from django.db.models import Prefetch, Q, Exists, OuterRef, F, Subquery, Case, When, Value, BooleanField
+from django.db.models.functions import Coalesce
 from django.utils.timezone import now
 from django.utils.translation import gettext_lazy as _
 from django_celery_beat.models import PeriodicTask, IntervalSchedule
 
 from apps.authentication.models import User
-from apps.scraper import rss
+from apps.scraper import rss, stats, unread, seen
+from apps.scraper.normalization import normalize_url, canonicalize_url
+
+
+FEED_STATUS_PENDING = 'pending'
+FEED_STATUS_ACTIVE = 'active'
+FEED_STATUS_FAILED = 'failed'
+
+SCHEDULER_PERIODIC_TASK = 'periodic_task'
+SCHEDULER_SWEEP = 'sweep'
+
+INTERVAL_MODE_TTL = 'ttl'
+INTERVAL_MODE_ADAPTIVE = 'adaptive'
+
+FAN_OUT_ON_READ = 'read'
+FAN_OUT_ON_WRITE = 'write'
+
+
+def _lock_feed_url(url):
+    # Transaction-level advisory locks are released on commit, once the feed is visible to everyone waiting for it.
+    # Other databases have to rely on the unique constraint alone.
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_xact_lock(hashtext(%s))', [f'scraper.feed:{url}'])
 
 
 class FeedManager(models.Manager):
-    def create_from_url(self, url):
-        feed_dict, _ = rss.parse_url(url)
-        feed_dict['url'] = url
-        feed = self.create(**feed_dict)
-        feed.update_items()  # TODO: fix: one extra request is being made here
-        feed.periodic_task = PeriodicTask(
-            name=f'Update feed #{feed.pk}',
-            task='apps.scraper.tasks.update_feed',
-            args=json.dumps([feed.pk])
-        )
-        feed.interval = feed.expected_ttl
-        feed.periodic_task.save()
-        feed.save()
+    def get_or_create_from_url(self, url, fetch=True):
+        url = normalize_url(url)
+        canonical_url = canonicalize_url(url)
+        with transaction.atomic():
+            # Everyone subscribing to the same new feed at the same time waits here while the first one fetches it
+            _lock_feed_url(canonical_url)
+            try:
+                feed = self.get(aliases__canonical_url=canonical_url)
+            except self.model.DoesNotExist:
+                pass
+            else:
+                if fetch and feed.status == FEED_STATUS_FAILED:
+                    feed.initialize()
+                return feed
+            try:
+                with transaction.atomic():
+                    return self.create_from_url(url, fetch=fetch)
+            except IntegrityError:
+                # Somebody else created it in the meantime, which only happens without the advisory lock
+                return self.get(aliases__canonical_url=canonical_url)
+
+    def create_from_url(self, url, fetch=True):
+        # Without fetching, the feed stays pending until `Feed.initialize` gets called, e.g. by a background task
+        feed = self.create(url=url, status=FEED_STATUS_PENDING)
+        FeedAlias.objects.create(canonical_url=canonicalize_url(url), feed=feed)
+        if fetch:
+            feed.initialize()
         return feed
 
     def for_user(self, user: User):
         return self.filter(users__in=[user])
 
+    def due_for_update(self):
+        # Feeds having their own periodic task are dispatched by celery beat itself
+        return self\
+            .filter(periodic_task__isnull=True, next_update_at__lte=now())\
+            .order_by('next_update_at')
+
 
 class Feed(models.Model):
     objects = FeedManager()
 
+    # Always stored normalized, see `normalize_url`
     url = models.URLField(
         _('url'),
+        unique=True,
     )
 
     title = models.TextField(
@@ -94,6 +143,14 @@ class Feed(models.Model):
         blank=True,
         null=True,
     )
+    skipHours = models.JSONField(
+        _('skip hours'),
+        default=list,
+    )
+    skipDays = models.JSONField(
+        _('skip days'),
+        default=list,
+    )
     image = models.JSONField(
         _('image'),
         default=dict,
@@ -105,16 +162,102 @@ class Feed(models.Model):
     )
 
     # Technical fields
+    etag = models.TextField(
+        _('etag'),
+        blank=True,
+        null=True,
+    )
+    last_modified = models.TextField(
+        _('last modified'),
+        blank=True,
+        null=True,
+    )
+    content_digest = models.CharField(
+        _('content digest'),
+        max_length=64,
+        blank=True,
+        null=True,
+    )
+    update_interval = models.DurationField(
+        _('update interval'),
+        blank=True,
+        null=True,
+    )
+    next_update_at = models.DateTimeField(
+        _('next update at'),
+        db_index=True,
+        blank=True,
+        null=True,
+    )
+    # The publisher asked not to be fetched before this time, with caching headers or `Retry-After`
+    not_before = models.DateTimeField(
+        _('not before'),
+        blank=True,
+        null=True,
+    )
+    # Moving average of the time between the publications of consecutive items, and when the latest one was published
+    publish_interval = models.DurationField(
+        _('publish interval'),
+        blank=True,
+        null=True,
+    )
+    last_published_at = models.DateTimeField(
+        _('last published at'),
+        blank=True,
+        null=True,
+    )
+    # New feeds are pending until they get fetched for the first time
+    status = models.CharField(
+        _('status'),
+        max_length=16,
+        choices=[
+            (FEED_STATUS_PENDING, _('pending')),
+            (FEED_STATUS_ACTIVE, _('active')),
+            (FEED_STATUS_FAILED, _('failed')),
+        ],
+        default=FEED_STATUS_ACTIVE,
+    )
+    # Bumped whenever the feed is updated, to tell cached representations of the feed apart
+    version = models.PositiveIntegerField(
+        _('version'),
+        default=0,
+    )
+
     @property
     def expected_ttl(self) -> timedelta:
         return self.ttl or settings.DIGICLOUD_DEFAULT_FEED_UPDATE_INTERVAL
 
+    @property
+    def adaptive_interval(self) -> timedelta:
+        estimate = self.publish_interval or self.expected_ttl
+        if self.last_published_at is not None:
+            # A feed that went quiet gets polled less and less often, instead of at the rate it used to publish
+            estimate = max(estimate, now() - self.last_published_at)
+        # Polling more often than the feed asks to be cached for is pointless
+        minimum = max(settings.DIGICLOUD_ADAPTIVE_MINIMUM_INTERVAL, self.ttl or timedelta())
+        interval = min(max(estimate, minimum), settings.DIGICLOUD_ADAPTIVE_MAXIMUM_INTERVAL)
+        # Rounded, so the interval doesn't change on every update, nor end up with countless interval schedules
+        return timedelta(minutes=round(interval / timedelta(minutes=1)))
+
+    @property
+    def preferred_interval(self) -> timedelta:
+        if settings.DIGICLOUD_UPDATE_INTERVAL_MODE == INTERVAL_MODE_ADAPTIVE:
+            return self.adaptive_interval
+        return self.expected_ttl
+
     @property
     def interval(self) -> timedelta:
+        if self.periodic_task is None:
+            return self.update_interval or self.expected_ttl
         return timedelta(seconds=self.periodic_task.interval.every)
 
     @interval.setter
     def interval(self, interval: timedelta):
+        if self.periodic_task is None:
+            self.update_interval = interval
+            if self.pk is not None:
+                self.save(update_fields=['update_interval'])
+            return
         interval_schedule, _ = IntervalSchedule.objects.get_or_create(
             every=interval.total_seconds(),
             period=IntervalSchedule.SECONDS,
@@ -122,6 +265,35 @@ class Feed(models.Model):
         self.periodic_task.interval = interval_schedule
         self.periodic_task.save()
 
+    def available_at(self, time):
+        """
+        Returns the earliest time, from `time` on, at which the publisher is fine with the feed being fetched.
+        """
+        if self.not_before is not None:
+            time = max(time, self.not_before)
+        # <skipHours> are in GMT, and so are <skipDays> as far as anyone can tell
+        available_time = time.astimezone(timezone.utc)
+        for _ in range(24 * 7):
+            weekday = rss.WEEKDAYS[available_time.weekday()]
+            if available_time.hour not in self.skipHours and weekday not in self.skipDays:
+                return available_time
+            available_time = available_time.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        return time  # Skipping every hour of the week means nothing, really
+
+    def defer(self, until):
+        # Publishers don't get to hold off updates for longer than our own backoff would
+        if until is not None:
+            until = min(until, now() + settings.DIGICLOUD_BACKOFF_MAXIMUM_DURATION)
+        if until != self.not_before:
+            self.not_before = until
+            self.save(update_fields=['not_before'])
+
+    def schedule_next_update(self):
+        if self.periodic_task is not None:
+            return  # Celery beat already knows when to run the periodic task of this feed
+        self.next_update_at = self.available_at(now() + self.interval)
+        self.save(update_fields=['next_update_at'])
+
     users = models.ManyToManyField(
         User,
         verbose_name=_('users'),
@@ -136,11 +308,95 @@ class Feed(models.Model):
         null=True,
     )
 
-    def update_items(self):
-        feed_dict, item_dict_list = rss.parse_url(self.url)
+    def initialize(self, response=None):
+        # The first update fills in the fields of the feed itself along with its items
+        self.update_items(response)
+        if settings.DIGICLOUD_FEED_SCHEDULER == SCHEDULER_PERIODIC_TASK:
+            self.periodic_task = PeriodicTask(
+                name=f'Update feed #{self.pk}',
+                task='apps.scraper.tasks.update_feed',
+                args=json.dumps([self.pk])
+            )
+            self.interval = self.preferred_interval
+            self.periodic_task.save()
+        else:
+            self.interval = self.preferred_interval
+            self.next_update_at = self.available_at(now() + self.interval)
+        self.status = FEED_STATUS_ACTIVE
+        self.save()
+
+    def observe_publications(self, items):
+        current_time = now()
+        # Items without a publication date, or with one in the future, are taken as published right now
+        dates = sorted(
+            item.pubDate if item.pubDate is not None and item.pubDate <= current_time else current_time
+            for item in items
+        )
+        if self.last_published_at is not None:
+            # Items that are dated before the latest known one were only published late, and don't tell us anything
+            dates = [self.last_published_at] + [date for date in dates if date > self.last_published_at]
+        smoothing = settings.DIGICLOUD_ADAPTIVE_SMOOTHING
+        for previous_date, date in zip(dates, dates[1:]):
+            gap = date - previous_date
+            if self.publish_interval is None:
+                self.publish_interval = gap
+            else:
+                self.publish_interval = gap * smoothing + self.publish_interval * (1 - smoothing)
+        if dates:
+            self.last_published_at = dates[-1]
+
+    def move_to(self, url):
+        try:
+            url = normalize_url(url)
+        except ValueError:
+            return  # A broken Location header isn't worth failing the update for
+        if url == self.url or len(url) > Feed._meta.get_field('url').max_length:
+            return
+        alias, _ = FeedAlias.objects.get_or_create(canonical_url=canonicalize_url(url), defaults={'feed': self})
+        if alias.feed_id != self.pk:
+            return  # It's already known as another feed, so this one keeps being fetched through the redirect
+        self.url = url
+        # Cached representations include the URL, and the update may well stop before bumping the version itself
+        self.version = F('version') + 1
+        self.save(update_fields=['url', 'version'])
+        self.refresh_from_db(fields=['version'])
+
+    def update_items(self, response=None):
+        if response is None:
+            response = rss.fetch_url(self.url, etag=self.etag, last_modified=self.last_modified)
+        try:
+            self._update_items(response)
+        finally:
+            response.close()
+
+    def _update_items(self, response):
+        if response.moved_to is not None:
+            # Following permanent redirects on every update would waste a round trip each time
+            self.move_to(response.moved_to)
+        self.defer(rss.fresh_until(response.headers))
+        if response.status_code == HTTPStatus.NOT_MODIFIED:
+            # The validators matched, so nothing has changed since the last update
+            stats.increment(stats.FEED_UPDATES_NOT_MODIFIED)
+            return
+
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if response.digest == self.content_digest:
+            # Plenty of servers ignore conditional requests but still return a byte-identical payload
+            stats.increment(stats.FEED_UPDATES_UNCHANGED)
+            if (etag, last_modified) != (self.etag, self.last_modified):
+                self.etag = etag
+                self.last_modified = last_modified
+                self.save(update_fields=['etag', 'last_modified'])
+            return
+
+        feed_dict, item_dict_list = rss.parse_response(response)
 
         for attr, value in feed_dict.items():
             setattr(self, attr, value)
+        self.etag = etag
+        self.last_modified = last_modified
+        self.content_digest = response.digest
         self.save()
 
         # RSS doesn't define a unique field for an item, and the closest we can get is the <guid> tag. The problem
@@ -151,23 +407,119 @@ class Feed(models.Model):
         # most straightforward and error-proof way of them is to consider their permalink as their unique ID.
         # Because most of the times, links aren't going to change. They should be considered permanent for any item.
 
-        present_item_keys = [present_item.link for present_item in self.items.all()]
+        # Only the links of the incoming batch are looked up (through the `(feed, link)` unique index), so the cost of
+        # an update doesn't grow with the history of the feed. This lookup is what tells us which items are new, while
+        # the unique constraint is what actually guarantees that concurrent updates can't insert the same item twice.
+        incoming_item_keys = {item_dict['link'] for item_dict in item_dict_list}
+        present_item_lookup = Q(link__in=incoming_item_keys - {None})
+        if None in incoming_item_keys:
+            present_item_lookup |= Q(link__isnull=True)
+        present_item_keys = set(self.items.filter(present_item_lookup).values_list('link', flat=True))
         fresh_items = []
 
         for item_dict in item_dict_list:
             if item_dict['link'] not in present_item_keys:
+                if item_dict['link'] is not None:
+                    # Items without a link can't be told apart, and the unique constraint doesn't cover them either
+                    present_item_keys.add(item_dict['link'])
                 fresh_items.append(Item(
                     feed=self,
                     **item_dict
                 ))
-        Item.objects.bulk_create(fresh_items)
+        try:
+            with transaction.atomic():
+                Item.objects.bulk_create(fresh_items)
+            raced = False
+        except IntegrityError:
+            # A concurrent update inserted some of the items after they were looked up, and there is no telling which
+            # ones are left to this update
+            Item.objects.bulk_create(fresh_items, ignore_conflicts=True)
+            raced = True
+        if fresh_items and settings.DIGICLOUD_TIMELINE_FAN_OUT == FAN_OUT_ON_WRITE:
+            # Primary keys aren't returned when conflicts are ignored, so the fresh items have to be looked up again
+            fresh_item_lookup = Q(link__in={item.link for item in fresh_items} - {None})
+            if any(item.link is None for item in fresh_items):
+                fresh_item_lookup |= Q(link__isnull=True)
+            TimelineEntry.objects.add_items(
+                self.users.values_list('pk', flat=True),
+                self.items.filter(fresh_item_lookup),
+            )
+        if fresh_items and settings.DIGICLOUD_CACHE_UNREAD_COUNTS:
+            subscriber_pks = set(self.users.values_list('pk', flat=True))
+            if raced:
+                # The concurrent update counts the items it inserted, so the counters are rebuilt rather than guessed
+                invalidated_pks = subscriber_pks
+            elif dates := [item.pubDate for item in fresh_items if item.pubDate is not None]:
+                # Backdated items may already be read through the watermarks of some subscribers, whose counters are
+                # rebuilt instead. Undated items go by their creation time, which is past every watermark.
+                invalidated_pks = set(Subscription.objects
+                                      .filter(feed=self, read_until__gte=min(dates))
+                                      .values_list('user', flat=True))
+            else:
+                invalidated_pks = set()
+            if invalidated_pks:
+                transaction.on_commit(partial(unread.invalidate, list(invalidated_pks)))
+            if incremented_pks := subscriber_pks - invalidated_pks:
+                transaction.on_commit(partial(unread.increment, list(incremented_pks), len(fresh_items)))
+        if not raced:
+            # The items of a lost race are observed by the update that won it
+            self.observe_publications(fresh_items)
+        # Only bumped once the items are in, so that a representation cached in between can't outlive the update
+        self.version = F('version') + 1
+        self.save(update_fields=['version', 'publish_interval', 'last_published_at'])
+        self.refresh_from_db(fields=['version'])
+        stats.increment(stats.FEED_UPDATES_PROCESSED)
+
+
+class FeedAlias(models.Model):
+    """
+    A canonical URL a feed is known by (see `canonicalize_url`). Every feed has one for the URL it was subscribed with,
+    and one for each URL it got permanently redirected to, so that all of them lead to the same feed.
+    """
+    canonical_url = models.CharField(
+        _('canonical url'),
+        max_length=2048,
+        unique=True,
+    )
+    feed = models.ForeignKey(
+        Feed,
+        verbose_name=_('feed'),
+        on_delete=models.CASCADE,
+        related_name='aliases',
+    )
+
+
+def _read_by_watermark(user):
+    # Items published (or fetched, when they have no date) until the watermark of the user's subscription to their feed
+    return Exists(Subscription.objects.filter(
+        user=user,
+        feed=OuterRef('feed'),
+        read_until__gte=Coalesce(OuterRef('pubDate'), OuterRef('date_created'), output_field=models.DateTimeField()),
+    ))
 
 
 class ItemQuerySet(models.QuerySet):
+    def unread(self, user: User):
+        queryset = self.filter(
+            ~Exists(Interaction.objects.filter(user=user, item=OuterRef('pk'))),
+            ~_read_by_watermark(user),
+        )
+        if pending_item_pks := seen.pending(user.pk):
+            # Seen events that haven't been flushed to the interactions yet
+            queryset = queryset.exclude(pk__in=pending_item_pks)
+        return queryset
+
     def unread_item_count(self, user: User):
-        all_query = self.filter(feed__subscription__user=user)
-        read_query = all_query.filter(interactions__user=user)
-        return all_query.count() - read_query.count()
+        return self\
+            .filter(feed__in=Subscription.objects.filter(user=user).values('feed'))\
+            .unread(user)\
+            .count()
+
+    def cached_unread_item_count(self, user: User):
+        if (count := unread.get(user.pk)) is None:
+            count = self.unread_item_count(user)
+            unread.store(user.pk, count)
+        return count
 
     def bookmarks(self, user: User):
         return self.filter(
@@ -175,16 +527,45 @@ class ItemQuerySet(models.QuerySet):
             interactions__user=user
         )
 
+    def with_user_interactions(self, user: User):
+        return self.prefetch_related(
+            Prefetch(
+                'interactions',
+                queryset=Interaction.objects.filter(user=user),
+                to_attr='user_interactions'
+            )
+        )
+
+    def with_user_annotations(self, user: User):
+        # Reads the user's interaction with each item within the same query, instead of prefetching the interactions
+        # with a second query and building a model instance for each one of them
+        interactions = Interaction.objects.filter(user=user, item=OuterRef('pk'))
+        seen_otherwise = Q(_read_by_watermark(user))
+        if pending_item_pks := seen.pending(user.pk):
+            # Seen events that haven't been flushed to the interactions yet
+            seen_otherwise |= Q(pk__in=pending_item_pks)
+        return self.annotate(
+            user_seen=Case(
+                When(seen_otherwise, then=Value(True)),
+                default=Exists(interactions.filter(date_seen__isnull=False)),
+                output_field=BooleanField(),
+            ),
+            user_bookmarked=Exists(interactions.filter(date_bookmarked__isnull=False)),
+            user_comment=Subquery(interactions.values('comment')[:1]),
+        )
+
     def for_user(self, user: User):
         return self\
             .filter(feed__users__in=[user])\
-            .prefetch_related(
-                Prefetch(
-                    'interactions',
-                    queryset=Interaction.objects.filter(user=user),
-                    to_attr='user_interactions'
-                )
-            )
+            .with_user_annotations(user)
+
+    def timeline(self, user: User):
+        # The date is read from the timeline entry rather than the item, so that ordering and paginating by it can be
+        # served by the `(user, pubDate)` index of the timeline
+        return self\
+            .filter(timeline_entries__user=user)\
+            .annotate(timeline_date=F('timeline_entries__pubDate'))\
+            .with_user_annotations(user)
 
 
 class Item(models.Model):
@@ -254,26 +635,80 @@ class Item(models.Model):
         through='Interaction',
     )
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['feed', 'link'], name='unique_feed_item_link'),
+        ]
+        indexes = [
+            # Matches the ordering of the timeline's keyset pagination
+            models.Index(fields=['-pubDate', '-id'], name='scraper_item_timeline_idx'),
+            # Serves listing and syncing the items of a single feed
+            models.Index(fields=['feed', '-pubDate', '-id'], name='scraper_item_feed_idx'),
+        ]
+
+    # The interaction properties read the annotations of `ItemQuerySet.with_user_annotations` when they are present,
+    # and the interactions prefetched by `ItemQuerySet.with_user_interactions` otherwise
+
     @property
     def is_seen(self):
+        if hasattr(self, 'user_seen'):
+            return self.user_seen
         assert hasattr(self, 'user_interactions')
         return len(self.user_interactions) > 0 and self.user_interactions[0].date_seen is not None
 
     @property
     def is_bookmarked(self):
+        if hasattr(self, 'user_bookmarked'):
+            return self.user_bookmarked
         assert hasattr(self, 'user_interactions')
         return len(self.user_interactions) > 0 and self.user_interactions[0].date_bookmarked is not None
 
     @property
     def comment(self):
+        if hasattr(self, 'user_comment'):
+            return self.user_comment
         assert hasattr(self, 'user_interactions')
-        return len(self.user_interactions) > 0 and self.user_interactions[0].comment
+        return self.user_interactions[0].comment if self.user_interactions else None
 
     def interact_with_user(self, user: User) -> 'Interaction':
-        return Interaction.objects.get_or_create(
+        interaction, created = Interaction.objects.get_or_create(
             user=user,
             item=self,
-        )[0]
+        )
+        # A buffered seen event has already been counted, and is written now along with the interaction. Neither are
+        # items below the read watermark counted as unread.
+        if created and not seen.discard(user.pk, self.pk) and not self._below_read_watermark(user):
+            transaction.on_commit(partial(unread.increment, [user.pk], -1))
+        return interaction
+
+    def mark_seen(self, user: User) -> bool:
+        if getattr(self, 'user_seen', False):
+            # Already seen, through an interaction, a pending event or the read watermark
+            return False
+        time = now()
+        if (buffered := seen.record(user.pk, self.pk, time)) is not None:
+            # `tasks.flush_seen_events` writes the interaction later on
+            created = buffered and not self._has_interaction(user)
+        else:
+            # A single upsert instead of `get_or_create`, which takes a SELECT and an INSERT and can race with
+            # concurrent views of the same item
+            created = Interaction.objects.insert_seen([(user.pk, self.pk, time)]) > 0
+        if created:
+            transaction.on_commit(partial(unread.increment, [user.pk], -1))
+        # Keeps the annotation of `ItemQuerySet.with_user_annotations` in line with the database
+        self.user_seen = True
+        return created
+
+    def _has_interaction(self, user: User):
+        if hasattr(self, 'user_seen'):
+            # The item is known not to be seen in any way at this point
+            return False
+        return Interaction.objects.filter(user=user, item=self).exists()
+
+    def _below_read_watermark(self, user: User):
+        return Subscription.objects\
+            .filter(user=user, feed=self.feed_id, read_until__gte=self.pubDate or self.date_created)\
+            .exists()
 
 
 class SubscriptionQuerySet(models.QuerySet):
@@ -281,6 +716,20 @@ class SubscriptionQuerySet(models.QuerySet):
     def for_user(self, user: User):
         return self.filter(user=user)
 
+    def mark_read(self, until):
+        """
+        Moves the read watermarks of the subscriptions forward to `until`, which marks every item of their feeds that
+        was published until then as read without writing an interaction for each one of them.
+        """
+        user_pks = list(self.values_list('user', flat=True).distinct())
+        # Watermarks never move backwards, so marking an older date as read doesn't bring items back. The existing
+        # interactions are kept, since they outlive the watermark when the feed gets unsubscribed from.
+        updated = self\
+            .filter(Q(read_until__isnull=True) | Q(read_until__lt=until))\
+            .update(read_until=until)
+        transaction.on_commit(partial(unread.invalidate, user_pks))
+        return updated
+
 
 class Subscription(models.Model):
     objects = SubscriptionQuerySet.as_manager()
@@ -299,9 +748,161 @@ class Subscription(models.Model):
         _('date created'),
         auto_now_add=True,
     )
+    # Every item of the feed published until then counts as read, with or without an interaction
+    read_until = models.DateTimeField(
+        _('read until'),
+        blank=True,
+        null=True,
+    )
+
+    def save(self, *args, **kwargs):
+        created = self._state.adding
+        super().save(*args, **kwargs)
+        if created and settings.DIGICLOUD_TIMELINE_FAN_OUT == FAN_OUT_ON_WRITE:
+            TimelineEntry.objects.add_items([self.user_id], self.feed.items.all())
+        transaction.on_commit(partial(unread.invalidate, [self.user_id]))
+
+    def delete(self, *args, **kwargs):
+        transaction.on_commit(partial(unread.invalidate, [self.user_id]))
+        result = super().delete(*args, **kwargs)
+        if not Subscription.objects.filter(user=self.user_id, feed=self.feed_id).exists():
+            TimelineEntry.objects.filter(user=self.user_id, feed=self.feed_id).delete()
+        return result
+
+
+class TimelineEntryManager(models.Manager):
+    def add_items(self, user_pks, items: ItemQuerySet, batch_size=1000):
+        entries = (
+            TimelineEntry(user_id=user_pk, item_id=item_pk, feed_id=feed_pk, pubDate=pub_date)
+            for item_pk, feed_pk, pub_date in items.values_list('pk', 'feed', 'pubDate').iterator()
+            for user_pk in user_pks
+        )
+        # `bulk_create` would turn the whole generator into a list, which can get really big for popular feeds
+        while batch := list(islice(entries, batch_size)):
+            self.bulk_create(batch, ignore_conflicts=True)
+
+
+class TimelineEntry(models.Model):
+    """
+    An item on the timeline of a user. Entries are written when items get fetched or a feed gets subscribed to (fan-out
+    on write), so listing the timeline becomes an index range scan instead of a join across items, feeds and
+    subscriptions. They are only maintained while `DIGICLOUD_TIMELINE_FAN_OUT` is set to "write".
+    """
+    objects = TimelineEntryManager()
+
+    user = models.ForeignKey(
+        User,
+        verbose_name=_('user'),
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+    )
+    item = models.ForeignKey(
+        Item,
+        verbose_name=_('item'),
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+    )
+    feed = models.ForeignKey(
+        Feed,
+        verbose_name=_('feed'),
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    pubDate = models.DateTimeField(
+        _('web pubDate'),
+        blank=True,
+        null=True,
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'item'], name='unique_timeline_entry'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-pubDate', '-item'], name='scraper_timeline_user_idx'),
+        ]
+
+
+class InteractionManager(models.Manager):
+    def insert_seen(self, events, batch_size=300):
+        """
+        Inserts the interactions of `(user_pk, item_pk, date_seen)` events, skipping the ones that already exist, and
+        returns how many were inserted. Unlike `bulk_create`, this keeps the seen dates of the events.
+        """
+        events = list(events)
+        inserted = 0
+        with connection.cursor() as cursor:
+            for start in range(0, len(events), batch_size):
+                batch = events[start:start + batch_size]
+                # A single multi-row statement per batch, which also skips the items deleted in the meantime. `WHERE
+                # true` keeps SQLite from taking the `ON CONFLICT` clause for a part of the join.
+                cursor.execute(
+                    f'INSERT INTO {self.model._meta.db_table} (user_id, item_id, date_seen) '
+                    f'SELECT events.column1, item.id, events.column3 '
+                    f'FROM (VALUES {", ".join(["(%s, %s, %s)"] * len(batch))}) AS events '
+                    f'JOIN {Item._meta.db_table} AS item ON item.id = events.column2 '
+                    f'WHERE true '
+                    f'ON CONFLICT (user_id, item_id) DO NOTHING',
+                    [value for event in batch for value in event],
+                )
+                inserted += cursor.rowcount
+        return inserted
+
+    def bulk_interact(self, user: User, seen=(), bookmark=(), unbookmark=()):
+        """
+        Marks the items as seen, bookmarks them or removes their bookmarks, with a fixed number of queries however many
+        there are. Items that don't exist or aren't in the user's feeds are skipped. Returns the pks of the items that
+        were found, and the ones each action changed.
+        """
+        # Items that are seen through the read watermark or a pending event already don't need an interaction for it
+        seen_item_pks = dict(Item.objects
+                             .filter(pk__in={*seen, *bookmark, *unbookmark}, feed__users__in=[user])
+                             .with_user_annotations(user)
+                             .values_list('pk', 'user_seen'))
+        found_item_pks = set(seen_item_pks)
+        interactions = {
+            interaction.item_id: interaction
+            for interaction in self.filter(user=user, item__in=found_item_pks)
+        }
+        time = now()
+        created, updated = {}, {}
+        changed = {'seen': set(), 'bookmark': set(), 'unbookmark': set()}
+
+        for item_pk in found_item_pks.intersection(seen):
+            if not seen_item_pks[item_pk] and item_pk not in interactions:
+                created[item_pk] = self.model(user=user, item_id=item_pk)
+                changed['seen'].add(item_pk)
+        for item_pk in found_item_pks.intersection(bookmark):
+            if (interaction := interactions.get(item_pk)) is None:
+                interaction = created.setdefault(item_pk, self.model(user=user, item_id=item_pk))
+            elif interaction.date_bookmarked is None:
+                updated[item_pk] = interaction
+            else:
+                continue
+            interaction.date_bookmarked = time
+            changed['bookmark'].add(item_pk)
+        for item_pk in found_item_pks.intersection(unbookmark):
+            if (interaction := interactions.get(item_pk)) is not None and interaction.date_bookmarked is not None:
+                interaction.date_bookmarked = None
+                updated[item_pk] = interaction
+                changed['unbookmark'].add(item_pk)
+
+        self.bulk_create(created.values(), ignore_conflicts=True)
+        if created_bookmark_pks := changed['bookmark'].intersection(created):
+            # Rows that a concurrent view of the items inserted first are skipped by `bulk_create`, and get their
+            # bookmarks here instead
+            self.filter(user=user, item__in=created_bookmark_pks, date_bookmarked__isnull=True)\
+                .update(date_bookmarked=time)
+        self.bulk_update(updated.values(), ['date_bookmarked'])
+        if created:
+            # Some of the items may have been seen concurrently, so the counter is rebuilt rather than decremented
+            transaction.on_commit(partial(unread.invalidate, [user.pk]))
+        return found_item_pks, changed
 
 
 class Interaction(models.Model):
+    objects = InteractionManager()
+
     user = models.ForeignKey(
         User,
         verbose_name=_('user'),
@@ -331,6 +932,18 @@ class Interaction(models.Model):
         null=True,
     )
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'item'], name='unique_user_item_interaction'),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', 'item'],
+                condition=Q(date_bookmarked__isnull=False),
+                name='scraper_interaction_bkmk_idx',
+            ),
+        ]
+
     def add_bookmark(self):
         self.date_bookmarked = now()
         self.save()
@@ -0,0 +1,51 @@
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+_DEFAULT_PORTS = {
+    'http': 80,
+    'https': 443,
+}
+
+# Query parameters added by analytics and ad platforms, which never change the content of a feed
+_TRACKING_PARAMETERS = frozenset({
+    'dclid', 'fbclid', 'gclid', 'igshid', 'mc_cid', 'mc_eid', 'msclkid', 'yclid', '_ga', '_hsenc', '_hsmi',
+})
+_TRACKING_PARAMETER_PREFIXES = ('utm_',)
+
+
+def normalize_url(url):
+    """
+    Returns the form of a feed URL that is stored and fetched. Only differences that can't change what the server
+    responds with are normalized: the case of the scheme and the host, default ports, empty paths and fragments.
+    Raises `ValueError` for URLs that can't be split, like the ones with a port out of range.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+
+    host = parts.hostname or ''
+    if ':' in host:
+        host = f'[{host}]'  # IPv6 addresses lose their brackets when split
+    if parts.port is not None and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f'{host}:{parts.port}'
+    if '@' in parts.netloc:
+        host = f'{parts.netloc.rpartition("@")[0]}@{host}'
+
+    return urlunsplit((scheme, host, parts.path or '/', parts.query, ''))
+
+
+def _is_tracking_parameter(name):
+    return name.lower() in _TRACKING_PARAMETERS or name.lower().startswith(_TRACKING_PARAMETER_PREFIXES)
+
+
+def canonicalize_url(url):
+    """
+    Returns the key that tells whether two URLs point to the same feed. On top of `normalize_url`, it ignores the
+    scheme, trailing slashes, the order of query parameters and tracking parameters. These are only equivalent by
+    convention, so the key is used for finding feeds and never for fetching them.
+    """
+    parts = urlsplit(normalize_url(url))
+    query = sorted(
+        (name, value)
+        for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not _is_tracking_parameter(name)
+    )
+    return urlunsplit(('', parts.netloc, parts.path.rstrip('/'), urlencode(query), '')).lstrip('/')
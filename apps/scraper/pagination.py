@@ -0,0 +1,107 @@
+import binascii
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+
+from django.db.models import F, Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int  # noqa
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginates a queryset by the position of the last row of the previous page, sorted by `(date_field, id_field)` in
+    descending order, instead of an offset. Fetching a page is an index range scan no matter how deep it is, and no
+    total count is ever computed. Rows without a date come before all the dated ones, which is how PostgreSQL sorts
+    NULLs in descending order anyway.
+
+    Only forward navigation is supported, which is what infinite scrolling needs. The first page is requested with an
+    empty cursor (`?cursor=`), and every page links to the next one.
+    """
+    date_field = 'pubDate'
+    id_field = 'id'
+
+    cursor_query_param = 'cursor'
+    limit_query_param = 'limit'
+    default_limit = api_settings.PAGE_SIZE
+    max_limit = 100
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_limit(request)
+        position = self.decode_cursor(request)
+
+        queryset = queryset.order_by(F(self.date_field).desc(nulls_first=True), F(self.id_field).desc())
+        if position is not None:
+            queryset = queryset.filter(self.get_position_filter(*position))
+
+        # Fetching one extra row is how we know whether there is a next page, without counting
+        results = list(queryset[:self.limit + 1])
+        self.has_next = len(results) > self.limit
+        self.page = results[:self.limit]
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {
+                    'type': 'string',
+                    'nullable': True,
+                },
+                'results': schema,
+            },
+        }
+
+    def get_limit(self, request):
+        try:
+            return _positive_int(request.query_params[self.limit_query_param], strict=True, cutoff=self.max_limit)
+        except (KeyError, ValueError):
+            return self.default_limit
+
+    def get_position_filter(self, date, pk):
+        if date is None:
+            return Q(**{f'{self.date_field}__isnull': True, f'{self.id_field}__lt': pk}) \
+                | Q(**{f'{self.date_field}__isnull': False})
+        return Q(**{f'{self.date_field}__lt': date}) \
+            | Q(**{self.date_field: date, f'{self.id_field}__lt': pk})
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        date = getattr(last, self.date_field)
+        cursor = self.encode_cursor(date.isoformat() if date is not None else None, getattr(last, self.id_field))
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    @staticmethod
+    def encode_cursor(date, pk):
+        return urlsafe_b64encode(json.dumps([date, pk]).encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            date, pk = json.loads(urlsafe_b64decode(encoded.encode()))
+            if date is not None and (date := parse_datetime(date)) is None:
+                raise ValueError
+            return date, int(pk)
+        except (TypeError, ValueError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+
+
+class TimelineKeysetPagination(KeysetPagination):
+    # Annotated by `ItemQuerySet.timeline`
+    date_field = 'timeline_date'
@@ -1,13 +1,25 @@
+import hashlib
+import io
 import re
-from datetime import timedelta
+import tempfile
+import time
+from datetime import timedelta, timezone
 from email.utils import parsedate_to_datetime
+from http import HTTPStatus
 
 import requests
 from bs4 import BeautifulSoup
+from django.conf import settings
+from django.utils.timezone import now
 from lxml import etree
 
 _PARSER_NAME = 'lxml-xml'
 
+# The values <skipDays> can have, in the order of `datetime.weekday`
+WEEKDAYS = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
+_MAX_AGE_PATTERN = re.compile(r'(?:^|,)\s*max-age\s*=\s*"?(\d+)"?', re.IGNORECASE)
+
 
 def _parse_categories(category_elems):
     return [
@@ -37,15 +49,27 @@ def _parse_enclosure(enclosure_elem):
     }
 
 
-def _parse_content(content):
+def _parse_skip_hours(hour_texts):
+    # Invalid hours are ignored, rather than failing the whole feed
+    return [int(text) for text in hour_texts if text and text.strip().isnumeric() and int(text) < 24]
+
+
+def _parse_skip_days(day_texts):
+    return [text.strip() for text in day_texts if text and text.strip() in WEEKDAYS]
+
+
+def _parse_soup_content(content):
     # These lines will make sure that HTML entities get decoded correctly
     dtd_str = """<?xml version="1.0"?>
 <!DOCTYPE
    xml
    PUBLIC "-//W3C//DTD XHTML 1.0 Transitional//EN" "http://www.w3.org/TR/xhtml1/DTD/xhtml1-transitional.dtd"
 >"""
-    content = re.sub(r'<\?xml(.*?)\?>', '', content)
-    tree = etree.fromstring(dtd_str + content)
+    if isinstance(content, str):
+        content = re.sub(r'<\?xml(.*?)\?>', '', content)
+        content = dtd_str + content
+    # This path only runs for documents the streaming parser rejected, so let lxml recover what it can
+    tree = etree.fromstring(content, etree.XMLParser(recover=True))
 
     soup = BeautifulSoup(etree.tostring(tree, encoding='unicode'), "lxml-xml")
     feed = {
@@ -62,6 +86,8 @@ def _parse_content(content):
         'generator': elem.text if (elem := soup.generator) else None,
         'ttl': timedelta(minutes=int(elem.text)) if (elem := soup.ttl) and elem.text.isnumeric() else None,
         'image': _parse_image(elem) if (elem := soup.image) else {},
+        'skipHours': _parse_skip_hours(elem.text for elem in soup.select('channel > skipHours > hour')),
+        'skipDays': _parse_skip_days(elem.text for elem in soup.select('channel > skipDays > day')),
     }
     items = [
         {
@@ -79,5 +105,235 @@ def _parse_content(content):
     return feed, items
 
 
+def _element_text(elem):
+    return ''.join(elem.itertext())
+
+
+def _parse_element_categories(category_elems):
+    return [
+        {
+            'title': _element_text(category_elem),
+            'domain': category_elem.get('domain'),
+        } for category_elem in category_elems
+    ]
+
+
+def _parse_element_image(image_elem):
+    return {
+        'url': image_elem.findtext('url'),
+        'title': image_elem.findtext('title'),
+        'link': image_elem.findtext('link'),
+        'width': int(text) if (text := image_elem.findtext('width')) and text.isnumeric() else None,
+        'height': int(text) if (text := image_elem.findtext('height')) and text.isnumeric() else None,
+        'description': image_elem.findtext('description'),
+    }
+
+
+def _parse_element_enclosure(enclosure_elem):
+    return {
+        'url': enclosure_elem.attrib['url'],
+        'length': int(enclosure_elem.attrib['length']),
+        'type': enclosure_elem.attrib['type'],
+    }
+
+
+def _parse_channel_element(channel_elem):
+    return {
+        'title': _element_text(channel_elem.find('title')),
+        'link': _element_text(channel_elem.find('link')),
+        'description': _element_text(channel_elem.find('description')),
+        'language': channel_elem.findtext('language'),
+        'copyright': channel_elem.findtext('copyright'),
+        'managingEditor': channel_elem.findtext('managingEditor'),
+        'webMaster': channel_elem.findtext('webMaster'),
+        'pubDate': parsedate_to_datetime(text) if (text := channel_elem.findtext('pubDate')) else None,
+        'lastBuildDate': parsedate_to_datetime(text) if (text := channel_elem.findtext('lastBuildDate')) else None,
+        'categories': _parse_element_categories(channel_elem.iterfind('category')),
+        'generator': channel_elem.findtext('generator'),
+        'ttl': timedelta(minutes=int(text)) if (text := channel_elem.findtext('ttl')) and text.isnumeric() else None,
+        'image': _parse_element_image(elem) if (elem := channel_elem.find('image')) is not None else {},
+        'skipHours': _parse_skip_hours(elem.text for elem in channel_elem.iterfind('skipHours/hour')),
+        'skipDays': _parse_skip_days(elem.text for elem in channel_elem.iterfind('skipDays/day')),
+    }
+
+
+def _parse_item_element(item_elem):
+    return {
+        'title': item_elem.findtext('title'),
+        'link': item_elem.findtext('link'),
+        'description': elem.text if (elem := item_elem.find('description')) is not None and len(elem) == 0 else None,
+        'author': item_elem.findtext('author'),
+        'categories': _parse_element_categories(item_elem.iterfind('category')),
+        'comments': item_elem.findtext('comments'),
+        'enclosure': _parse_element_enclosure(elem) if (elem := item_elem.find('enclosure')) is not None else {},
+        'guid': item_elem.findtext('guid'),
+        'pubDate': parsedate_to_datetime(text) if (text := item_elem.findtext('pubDate')) else None,
+    }
+
+
+def _iterparse_content(source):
+    feed = None
+    items = []
+    for _, elem in etree.iterparse(source, events=('end',), tag=('item', 'channel')):
+        if elem.tag == 'item':
+            items.append(_parse_item_element(elem))
+            # Drop every parsed item right away, so only the channel metadata stays in the tree
+            elem.clear()
+            elem.getparent().remove(elem)
+        elif feed is None:
+            feed = _parse_channel_element(elem)
+    return feed, items
+
+
+def _parse_content(content):
+    # lxml refuses to parse unicode strings having an encoding declaration, and the content is already decoded
+    stripped_content = re.sub(r'<\?xml(.*?)\?>', '', content).lstrip()
+    try:
+        feed, items = _iterparse_content(io.BytesIO(stripped_content.encode()))
+    except etree.XMLSyntaxError:
+        feed = None
+    if feed is None:
+        return _parse_soup_content(content)
+    return feed, items
+
+
+def _parse_stream(stream):
+    try:
+        feed, items = _iterparse_content(stream)
+    except etree.XMLSyntaxError:
+        feed = None
+    if feed is None:
+        stream.seek(0)
+        return _parse_soup_content(stream.read())
+    return feed, items
+
+
+class ResponseTooLarge(requests.RequestException):
+    pass
+
+
+def _permanent_location(response: requests.Response):
+    # Only the redirects at the start of the chain moved the requested URL for good, a temporary one breaks the chain
+    location = None
+    for hop, following in zip(response.history, [*response.history[1:], response]):
+        if hop.status_code not in (HTTPStatus.MOVED_PERMANENTLY, HTTPStatus.PERMANENT_REDIRECT):
+            break
+        location = following.url
+    return location
+
+
+class FeedResponse:
+    """
+    The response of a feed request, with its body downloaded in chunks into a spooled temporary file. Small bodies stay
+    in memory and larger ones move to disk, so memory usage is bounded no matter how big a feed is, and the parser gets
+    to read the body incrementally.
+    """
+
+    def __init__(self, response: requests.Response):
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.moved_to = _permanent_location(response)
+        self.digest = None
+        self.body = None
+        with response:
+            # Error pages aren't feeds, and raising lets the caller back off
+            response.raise_for_status()
+            if self.status_code != HTTPStatus.NOT_MODIFIED:
+                try:
+                    self._download(response)
+                except BaseException:
+                    self.close()
+                    raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        # Bodies that were spooled to the disk hold a file descriptor until they are closed
+        if self.body is not None:
+            self.body.close()
+
+    def _download(self, response: requests.Response):
+        maximum_size = settings.DIGICLOUD_FETCH_MAXIMUM_SIZE
+        content_length = response.headers.get('Content-Length') or ''
+        # A malformed length is treated as a missing one, the size is checked while downloading anyway
+        if content_length.isdigit() and int(content_length) > maximum_size:
+            raise ResponseTooLarge(f'The feed is larger than {maximum_size} bytes', response=response)
+
+        # The read timeout only applies to each read, so a server sending a trickle of bytes needs a deadline too
+        deadline = time.monotonic() + settings.DIGICLOUD_FETCH_MAXIMUM_DURATION.total_seconds()
+        digest = hashlib.sha256()
+        size = 0
+        self.body = tempfile.SpooledTemporaryFile(max_size=settings.DIGICLOUD_FETCH_SPOOL_SIZE)
+        for chunk in response.iter_content(chunk_size=settings.DIGICLOUD_FETCH_CHUNK_SIZE):
+            if size == 0:
+                # An XML declaration is only allowed at the very beginning of the document
+                chunk = chunk.lstrip()
+            size += len(chunk)
+            if size > maximum_size:
+                raise ResponseTooLarge(f'The feed is larger than {maximum_size} bytes', response=response)
+            if time.monotonic() > deadline:
+                raise requests.Timeout('Downloading the feed took too long', response=response)
+            digest.update(chunk)
+            self.body.write(chunk)
+        self.body.seek(0)
+        self.digest = digest.hexdigest()
+
+
+def _parse_http_date(value):
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return date if date.tzinfo is not None else date.replace(tzinfo=timezone.utc)
+
+
+def fresh_until(headers):
+    """
+    Returns when a response stops being fresh according to its `Cache-Control` or `Expires` header, i.e. the time
+    before which fetching the feed again would most likely return the same content.
+    """
+    cache_control = headers.get('Cache-Control') or ''
+    if match := _MAX_AGE_PATTERN.search(cache_control):
+        age = int(text) if (text := headers.get('Age')) and text.isnumeric() else 0
+        return now() + timedelta(seconds=max(int(match[1]) - age, 0))
+    if (expires := _parse_http_date(headers.get('Expires'))) is not None:
+        # Measured against the clock of the server, which might not agree with ours
+        date = _parse_http_date(headers.get('Date')) or now()
+        return now() + (expires - date)
+    return None
+
+
+def retry_after(response: requests.Response):
+    if response.status_code not in (HTTPStatus.TOO_MANY_REQUESTS, HTTPStatus.SERVICE_UNAVAILABLE):
+        return None
+    value = (response.headers.get('Retry-After') or '').strip()
+    if value.isnumeric():
+        return now() + timedelta(seconds=int(value))
+    return _parse_http_date(value)
+
+
+def fetch_url(url, etag=None, last_modified=None, session=None, timeout=None):
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+    return FeedResponse((session or requests).get(
+        url,
+        headers=headers,
+        timeout=timeout or settings.DIGICLOUD_FETCH_TIMEOUT,
+        stream=True,
+    ))
+
+
+def parse_response(response: FeedResponse):
+    return _parse_stream(response.body)
+
+
 def parse_url(url):
-    return _parse_content(requests.get(url).text)
+    with fetch_url(url) as response:
+        return parse_response(response)
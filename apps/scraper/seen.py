@@ -0,0 +1,110 @@
+"""
+Write-behind buffer of "seen" events, kept in Redis until `tasks.flush_seen_events` writes them as interactions in bulk.
+
+Every user with pending events has a hash of the items they've seen, mapped to when they were first seen, and is listed
+in a set so the flush knows whose hashes to drain. Drained events are only removed from the hashes once they've been
+written. Reads merge the pending events with the interactions, so items show up as seen right away. When Redis is
+unavailable, events are written to the database synchronously instead.
+"""
+import logging
+from datetime import datetime, timezone
+
+import redis
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_KEY_PREFIX = 'scraper:seen:'
+_USERS_KEY = 'scraper:seen-users'
+
+_client = None
+
+
+def _redis() -> redis.Redis:
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(settings.DIGICLOUD_REDIS_URL)
+    return _client
+
+
+def _key(user_pk):
+    return f'{_KEY_PREFIX}{user_pk}'
+
+
+def record(user_pk, item_pk, time: datetime):
+    """
+    Buffers an event, and tells whether it's the first one of the user for the item since the last flush. Returns
+    `None` if buffering is disabled or failed, and the event has to be written right away.
+    """
+    if not settings.DIGICLOUD_BUFFER_SEEN_EVENTS:
+        return None
+    try:
+        with _redis().pipeline() as pipeline:
+            pipeline.hsetnx(_key(user_pk), item_pk, time.timestamp())
+            pipeline.sadd(_USERS_KEY, user_pk)
+            added, _ = pipeline.execute()
+    except redis.RedisError:
+        logger.warning('Buffering a seen event of user #%s failed', user_pk, exc_info=True)
+        return None
+    return bool(added)
+
+
+def discard(user_pk, item_pk):
+    """
+    Drops a buffered event, once its interaction got written some other way. Tells whether there was one.
+    """
+    if not settings.DIGICLOUD_BUFFER_SEEN_EVENTS:
+        return False
+    try:
+        return bool(_redis().hdel(_key(user_pk), item_pk))
+    except redis.RedisError:
+        logger.warning('Discarding a seen event of user #%s failed', user_pk, exc_info=True)
+        return False
+
+
+def pending(user_pk):
+    if not settings.DIGICLOUD_BUFFER_SEEN_EVENTS:
+        return []
+    try:
+        return [int(item_pk) for item_pk in _redis().hkeys(_key(user_pk))]
+    except redis.RedisError:
+        logger.warning('Reading the seen events of user #%s failed', user_pk, exc_info=True)
+        return []
+
+
+def drain(count):
+    """
+    Reads the events of up to `count` users from the buffer, and returns them as `{user_pk: {item_pk: time}}`. The
+    events stay pending until `remove` is called with them, so the items don't look unseen while they're being written.
+    """
+    user_pks = [int(user_pk) for user_pk in _redis().spop(_USERS_KEY, count)]
+    with _redis().pipeline() as pipeline:
+        for user_pk in user_pks:
+            pipeline.hgetall(_key(user_pk))
+        results = pipeline.execute()
+    return {
+        user_pk: {
+            int(item_pk): datetime.fromtimestamp(float(time), timezone.utc)
+            for item_pk, time in user_events.items()
+        }
+        for user_pk, user_events in zip(user_pks, results)
+        if user_events
+    }
+
+
+def remove(events):
+    """
+    Drops drained events from the buffer, once their interactions have been written.
+    """
+    with _redis().pipeline() as pipeline:
+        for user_pk, user_events in events.items():
+            pipeline.hdel(_key(user_pk), *user_events)
+        pipeline.execute()
+
+
+def restore(events):
+    """
+    Lists the users of drained events for the next flush again, when writing the events failed.
+    """
+    if events:
+        _redis().sadd(_USERS_KEY, *events)
@@ -1,6 +1,15 @@
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.timezone import now
 from rest_framework import serializers
+from rest_framework.reverse import reverse
+from rest_framework.utils.urls import replace_query_param
 
-from apps.scraper.models import Subscription, Feed, Item, Interaction
+from apps.scraper import tasks
+from apps.scraper.models import Subscription, Feed, Item, Interaction, FEED_STATUS_ACTIVE
+from apps.scraper.normalization import normalize_url
 
 
 class ItemSerializer(serializers.HyperlinkedModelSerializer):
@@ -13,7 +22,37 @@ class ItemSerializer(serializers.HyperlinkedModelSerializer):
         exclude = ('viewers',)
 
 
+class BulkInteractionSerializer(serializers.Serializer):
+    max_items = 500
+
+    seen = serializers.ListField(child=serializers.IntegerField(), required=False)
+    bookmark = serializers.ListField(child=serializers.IntegerField(), required=False)
+    unbookmark = serializers.ListField(child=serializers.IntegerField(), required=False)
+
+    def validate(self, attrs):
+        if sum(len(item_pks) for item_pks in attrs.values()) > self.max_items:
+            raise serializers.ValidationError(f'At most {self.max_items} items can be given at once.')
+        if set(attrs.get('bookmark', ())) & set(attrs.get('unbookmark', ())):
+            raise serializers.ValidationError({'unbookmark': 'Must not contain items that are being bookmarked.'})
+        return attrs
+
+
+class ItemFilterSerializer(serializers.Serializer):
+    feed = serializers.IntegerField(required=False)
+    since = serializers.DateTimeField(required=False)
+    until = serializers.DateTimeField(required=False)
+    unread = serializers.BooleanField(required=False)
+    bookmarked = serializers.BooleanField(required=False)
+
+    def validate(self, attrs):
+        if 'since' in attrs and 'until' in attrs and attrs['since'] > attrs['until']:
+            raise serializers.ValidationError({'until': 'Must not be before `since`.'})
+        return attrs
+
+
 class FeedSerializer(serializers.HyperlinkedModelSerializer):
+    include_query_param = 'include'
+
     # Defining this relation manually because it's a reverse relation and should be explicitly
     # declared in the `fields` attribute of the `Meta` class, and it's impossible (because we
     # already use the `excluded` attribute).
@@ -22,23 +61,47 @@ class FeedSerializer(serializers.HyperlinkedModelSerializer):
         view_name='item-detail',
         read_only=True
     )
+    item_count = serializers.IntegerField(source='items.count', read_only=True)
+    items_url = serializers.SerializerMethodField()
 
     class Meta:
         model = Feed
-        exclude = ('users', 'periodic_task',)
+        # The update bookkeeping changes on every poll, it isn't part of the feed and would keep cached
+        # representations from being reused
+        exclude = ('users', 'periodic_task', 'etag', 'last_modified', 'content_digest', 'update_interval',
+                   'next_update_at', 'version', 'publish_interval', 'last_published_at', 'not_before',)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        # Listing every item means loading and reversing a URL for each one of them, which gets really expensive for
+        # large feeds, so it's only done when asked for with `?include=items`
+        request = self.context.get('request')
+        if request is None or 'items' not in request.query_params.get(self.include_query_param, '').split(','):
+            fields.pop('items')
+        return fields
+
+    def get_items_url(self, feed):
+        url = reverse('item-list', request=self.context.get('request'))
+        return replace_query_param(url, 'feed', feed.pk)
 
 
 class SubscriptionCreationSerializer(serializers.Serializer):
     feed_url = serializers.URLField(write_only=True)
     feed = FeedSerializer(read_only=True)
 
-    def create(self, validated_data):
+    def validate_feed_url(self, value):
+        # `URLValidator` lets through a few URLs that can't actually be split, like the ones with a port out of range
         try:
-            feed = Feed.objects.get(url=validated_data['feed_url'])
-        except Feed.DoesNotExist:
-            feed = Feed.objects.create_from_url(validated_data['feed_url'])
-            # TODO: possible race condition when two people try to create the same feed at the same time!
+            normalize_url(value)
+        except ValueError:
+            raise serializers.ValidationError('Enter a valid URL.')
+        return value
 
+    def create(self, validated_data):
+        background = settings.DIGICLOUD_ASYNC_SUBSCRIPTIONS
+        feed = Feed.objects.get_or_create_from_url(validated_data['feed_url'], fetch=not background)
+        if feed.status != FEED_STATUS_ACTIVE:
+            transaction.on_commit(partial(tasks.initialize_feed.delay, feed.pk))
         return Subscription.objects.create(
             user=self.context['request'].user,
             feed=feed,
@@ -52,7 +115,17 @@ class SubscriptionSerializer(serializers.HyperlinkedModelSerializer):
 
     class Meta:
         model = Subscription
-        fields = ('url', 'feed', 'date_created')
+        fields = ('url', 'feed', 'date_created', 'read_until')
+        read_only_fields = ('read_until',)
+
+
+class MarkReadSerializer(serializers.Serializer):
+    # Defaults to the time of the request
+    until = serializers.DateTimeField(required=False)
+
+    def validate_until(self, value):
+        # Watermarks never move backwards, so one in the future would hide every item published until then for good
+        return min(value, now())
 
 
 class CommentSerializer(serializers.ModelSerializer):
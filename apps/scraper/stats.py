@@ -0,0 +1,52 @@
+"""
+Operational counters, kept in Redis so that the counts of every worker and web process add up, and the management
+commands can read them from a process of their own. Counting is best effort: a failure is logged and never gets in the
+way of the work being counted.
+"""
+import logging
+
+import redis
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_KEY_PREFIX = 'scraper:stats:'
+
+FEED_UPDATES_PROCESSED = 'feed_updates:processed'
+FEED_UPDATES_NOT_MODIFIED = 'feed_updates:not_modified'
+FEED_UPDATES_UNCHANGED = 'feed_updates:unchanged'
+FEED_CACHE_HITS = 'feed_cache:hits'
+FEED_CACHE_MISSES = 'feed_cache:misses'
+
+_client = None
+
+
+def _redis() -> redis.Redis:
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(settings.DIGICLOUD_REDIS_URL)
+    return _client
+
+
+def increment(name, delta=1):
+    try:
+        return _redis().incrby(_KEY_PREFIX + name, delta)
+    except redis.RedisError:
+        logger.warning('Incrementing the %s counter failed', name, exc_info=True)
+        return None
+
+
+def get(name):
+    try:
+        value = _redis().get(_KEY_PREFIX + name)
+    except redis.RedisError:
+        logger.warning('Reading the %s counter failed', name, exc_info=True)
+        return 0
+    return int(value) if value is not None else 0
+
+
+def reset(name):
+    try:
+        _redis().delete(_KEY_PREFIX + name)
+    except redis.RedisError:
+        logger.warning('Resetting the %s counter failed', name, exc_info=True)
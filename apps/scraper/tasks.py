@@ -1,26 +1,107 @@
+import logging
+
 from celery import shared_task
 from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils.timezone import now
 from requests import RequestException
 
-from apps.scraper.models import Feed
+from apps.scraper import fetch, rss, seen
+from apps.scraper.models import Feed, Interaction, FEED_STATUS_ACTIVE, FEED_STATUS_FAILED, INTERVAL_MODE_ADAPTIVE
+
+logger = logging.getLogger(__name__)
 
 
 @shared_task
 def update_feed(feed_pk):
     feed = Feed.objects.filter(pk=feed_pk).select_related('periodic_task__interval').first()
+    if (current_time := now()) < feed.available_at(current_time):
+        return  # Celery beat doesn't know what the publisher asked for, so the runs that come too early are skipped
     _update_feed(feed)
 
 
-def _update_feed(feed: Feed):
+@shared_task
+def initialize_feed(feed_pk):
     try:
-        feed.update_items()
+        with transaction.atomic():
+            # Locking the row makes repeated dispatches for the same feed wait for the first one, and then skip it
+            feed = Feed.objects.select_for_update().get(pk=feed_pk)
+            if feed.status == FEED_STATUS_ACTIVE:
+                return
+            feed.initialize()
+    except Exception:  # noqa
+        logger.exception('Fetching new feed #%s failed', feed_pk)
+        # The version changes along with the status, so cached representations don't keep showing it as pending
+        Feed.objects.filter(pk=feed_pk).update(status=FEED_STATUS_FAILED, version=F('version') + 1)
+
+
+@shared_task
+def update_feeds(feed_pks):
+    feeds = Feed.objects.filter(pk__in=feed_pks).select_related('periodic_task__interval')
+    for feed, result in fetch.fetch_feeds(feeds):
+        try:
+            _update_feed(feed, result)
+        except Exception:  # noqa
+            # A single broken feed shouldn't prevent the rest of the batch from being updated
+            logger.exception('Updating feed #%s failed', feed.pk)
+
+
+@shared_task
+def sweep_feeds():
+    batch_size = settings.DIGICLOUD_SWEEP_BATCH_SIZE
+    with transaction.atomic():
+        due_feeds = Feed.objects.due_for_update().select_for_update(skip_locked=True)
+        limit = batch_size * settings.DIGICLOUD_SWEEP_MAXIMUM_BATCHES
+        due_feed_pks = list(due_feeds.values_list('pk', flat=True)[:limit])
+        # Claim the feeds, so the following sweeps don't dispatch them again before their batches get processed
+        Feed.objects\
+            .filter(pk__in=due_feed_pks)\
+            .update(next_update_at=now() + settings.DIGICLOUD_SWEEP_CLAIM_DURATION)
 
+    for i in range(0, len(due_feed_pks), batch_size):
+        update_feeds.delay(due_feed_pks[i:i + batch_size])
+
+
+@shared_task
+def flush_seen_events():
+    if not settings.DIGICLOUD_BUFFER_SEEN_EVENTS:
+        return
+    while events := seen.drain(settings.DIGICLOUD_SEEN_FLUSH_BATCH_SIZE):
+        try:
+            Interaction.objects.insert_seen([
+                (user_pk, item_pk, time)
+                for user_pk, user_events in events.items()
+                for item_pk, time in user_events.items()
+            ])
+        except Exception:  # noqa
+            seen.restore(events)
+            raise
+        seen.remove(events)
+
+
+def _update_feed(feed: Feed, fetch_result=None):
+    try:
+        if isinstance(fetch_result, BaseException):
+            # The feed has already been fetched by the batch fetcher, so its error is re-raised to be handled here
+            raise fetch_result
+        feed.update_items(fetch_result)
+
+        if settings.DIGICLOUD_UPDATE_INTERVAL_MODE == INTERVAL_MODE_ADAPTIVE:
+            # This also resets the backoff
+            if (adaptive_interval := feed.adaptive_interval) != feed.interval:
+                feed.interval = adaptive_interval
         # Reset backoff if the request succeeds
-        if (expected_ttl := feed.expected_ttl) < feed.interval:
+        elif (expected_ttl := feed.expected_ttl) < feed.interval:
             feed.interval = expected_ttl
 
-    except RequestException:  # Try a simple exponential backoff mechanism
+    except RequestException as error:  # Try a simple exponential backoff mechanism
         feed.interval = min(
             feed.interval * settings.DIGICLOUD_BACKOFF_FACTOR,
             settings.DIGICLOUD_BACKOFF_MAXIMUM_DURATION
         )
+        # Other errors keep whatever an earlier response asked for
+        if error.response is not None and (retry_time := rss.retry_after(error.response)) is not None:
+            feed.defer(retry_time)
+
+    feed.schedule_next_update()
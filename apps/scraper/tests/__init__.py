@@ -92,6 +92,8 @@ SAMPLE_FEED = {
         'width': 48,
         'height': 48,
     },
+    'skipHours': [],
+    'skipDays': [],
 }
 
 SAMPLE_ITEMS = [
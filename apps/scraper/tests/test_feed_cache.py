@@ -0,0 +1,58 @@
+from unittest import mock
+from unittest.mock import Mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.scraper import feed_cache, stats
+from apps.scraper.models import Feed
+from apps.scraper.tests import SAMPLE_FEED
+from apps.scraper.views import FeedViewSet
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class FeedCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory(SERVER_NAME='localhost')
+        self.feed = Feed.objects.create(url='https://test.com', **SAMPLE_FEED)
+
+    def _get_or_set(self, serialize, server_name='localhost'):
+        request = Request(self.factory.get('/api/feeds/1/', SERVER_NAME=server_name))
+        return feed_cache.get_or_set(self.feed, request, serialize)
+
+    @mock.patch('apps.scraper.stats.increment')
+    def test_hit(self, mock_increment: Mock):
+        serialize = Mock(return_value={'title': 'test'})
+        self.assertEqual(self._get_or_set(serialize), {'title': 'test'})
+        self.assertEqual(self._get_or_set(serialize), {'title': 'test'})
+        serialize.assert_called_once()
+        self.assertListEqual(mock_increment.call_args_list, [
+            mock.call(stats.FEED_CACHE_MISSES),
+            mock.call(stats.FEED_CACHE_HITS),
+        ])
+
+    def test_new_version_misses(self):
+        self._get_or_set(Mock(return_value={'title': 'old'}))
+        self.feed.version += 1
+        self.assertEqual(self._get_or_set(Mock(return_value={'title': 'new'})), {'title': 'new'})
+
+    def test_hosts_are_cached_separately(self):
+        self._get_or_set(Mock(return_value={'url': 'http://localhost'}))
+        self.assertEqual(
+            self._get_or_set(Mock(return_value={'url': 'http://127.0.0.1'}), server_name='127.0.0.1'),
+            {'url': 'http://127.0.0.1'},
+        )
+
+    @mock.patch('apps.scraper.feed_cache.cache')
+    def test_cache_is_skipped_for_full_representations(self, mock_cache: Mock):
+        view = FeedViewSet.as_view({'get': 'retrieve'})
+        request = self.factory.get(f'/api/feeds/{self.feed.pk}/', {'include': 'items'})
+        with mock.patch.object(FeedViewSet, 'get_object', return_value=self.feed), \
+                mock.patch.object(FeedViewSet, 'permission_classes', ()):
+            response = view(request, pk=self.feed.pk)
+
+        self.assertEqual(response.data['items'], [])
+        mock_cache.get.assert_not_called()
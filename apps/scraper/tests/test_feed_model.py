@@ -1,31 +1,42 @@
-from datetime import timedelta
+import hashlib
+from datetime import timedelta, datetime, timezone
 from unittest import mock
 from unittest.mock import Mock
 
 from django.conf import settings
 from django.forms import model_to_dict
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.utils.timezone import now
 from django_celery_beat.models import PeriodicTask, IntervalSchedule
 
 from apps.authentication.models import User
 from apps.authentication.tests import SAMPLE_USER
-from apps.scraper.models import Item, Feed
-from apps.scraper.tests import SAMPLE_FEED, SAMPLE_ITEMS
+from apps.scraper import stats
+from apps.scraper.models import Item, Feed, Subscription, FEED_STATUS_ACTIVE, FEED_STATUS_PENDING, FEED_STATUS_FAILED
+from apps.scraper.tests import SAMPLE_FEED, SAMPLE_ITEMS, SAMPLE_XML
+
+SAMPLE_DIGEST = hashlib.sha256(SAMPLE_XML.encode()).hexdigest()
 
 
 class FeedModelTestCase(TestCase):
     def setUp(self):
         self.maxDiff = 10000
 
-    @mock.patch('apps.scraper.rss.parse_url')
-    def test_update_items(self, mock_parse_url: Mock):
-        mock_parse_url.return_value = (SAMPLE_FEED.copy(), SAMPLE_ITEMS.copy())
+    @mock.patch('apps.scraper.rss.fetch_url')
+    @mock.patch('apps.scraper.rss.parse_response')
+    def test_update_items(self, mock_parse_response: Mock, mock_fetch_url: Mock):
+        mock_parse_response.return_value = (SAMPLE_FEED.copy(), SAMPLE_ITEMS.copy())
+        mock_fetch_url.return_value.status_code = 200
+        mock_fetch_url.return_value.moved_to = None
+        mock_fetch_url.return_value.headers = {}
+        mock_fetch_url.return_value.digest = SAMPLE_DIGEST
 
         url = 'https://test.com'
         feed = Feed(url=url, **SAMPLE_FEED)
         feed.update_items()
 
-        mock_parse_url.assert_called_once_with(url)
+        mock_fetch_url.assert_called_once_with(url, etag=None, last_modified=None)
+        mock_parse_response.assert_called_once_with(mock_fetch_url.return_value)
         output_item_dicts = []
         for item in Item.objects.all():
             item_dict = model_to_dict(item)
@@ -39,23 +50,249 @@ class FeedModelTestCase(TestCase):
             SAMPLE_ITEMS
         )
 
-    @mock.patch('apps.scraper.rss.parse_url')
-    @mock.patch('apps.scraper.models.Feed.update_items')
-    def test_create_from_url(self, mock_update_items: Mock, mock_parse_url: Mock):
-        mock_parse_url.return_value = (SAMPLE_FEED.copy(), SAMPLE_ITEMS.copy())
+    @mock.patch('apps.scraper.rss.fetch_url')
+    @mock.patch('apps.scraper.rss.parse_response')
+    def test_update_items_skips_present_items(self, mock_parse_response: Mock, mock_fetch_url: Mock):
+        mock_parse_response.return_value = (SAMPLE_FEED.copy(), SAMPLE_ITEMS.copy())
+        mock_fetch_url.return_value.status_code = 200
+        mock_fetch_url.return_value.moved_to = None
+        mock_fetch_url.return_value.headers = {}
+        mock_fetch_url.return_value.digest = SAMPLE_DIGEST
+
+        feed = Feed.objects.create(url='https://test.com', **SAMPLE_FEED)
+        Item.objects.create(feed=feed, **SAMPLE_ITEMS[0])
+        Item.objects.create(feed=feed, link='https://test.com/old-item')
+        feed.update_items()
+
+        self.assertEqual(Item.objects.filter(link=SAMPLE_ITEMS[0]['link']).count(), 1)
+        self.assertEqual(Item.objects.filter(link=SAMPLE_ITEMS[1]['link']).count(), 1)
+        self.assertEqual(Item.objects.count(), 3)
+
+    @mock.patch('apps.scraper.rss.fetch_url')
+    @mock.patch('apps.scraper.rss.parse_response')
+    def test_update_items_ignores_duplicate_links(self, mock_parse_response: Mock, mock_fetch_url: Mock):
+        mock_parse_response.return_value = (SAMPLE_FEED.copy(), [SAMPLE_ITEMS[0], SAMPLE_ITEMS[0]])
+        mock_fetch_url.return_value.status_code = 200
+        mock_fetch_url.return_value.moved_to = None
+        mock_fetch_url.return_value.headers = {}
+        mock_fetch_url.return_value.digest = SAMPLE_DIGEST
+
+        feed = Feed.objects.create(url='https://test.com', **SAMPLE_FEED)
+        # Simulate a concurrent update that inserted the item right after the lookup of present items
+        with mock.patch('apps.scraper.models.Item.objects.bulk_create', wraps=Item.objects.bulk_create) as mock_bulk:
+            Item.objects.create(feed=feed, **SAMPLE_ITEMS[0])
+            with mock.patch('django.db.models.QuerySet.values_list', return_value=[]):
+                feed.update_items()
+
+        self.assertEqual(len(mock_bulk.call_args.args[0]), 1)
+        self.assertEqual(Item.objects.filter(link=SAMPLE_ITEMS[0]['link']).count(), 1)
+
+    @override_settings(DIGICLOUD_CACHE_UNREAD_COUNTS=True)
+    @mock.patch('apps.scraper.unread.invalidate')
+    @mock.patch('apps.scraper.unread.increment')
+    @mock.patch('apps.scraper.rss.fetch_url')
+    @mock.patch('apps.scraper.rss.parse_response')
+    def test_update_items_lost_race_invalidates_unread_counters(self, mock_parse_response: Mock, mock_fetch_url: Mock,
+                                                                mock_increment: Mock, mock_invalidate: Mock):
+        mock_parse_response.return_value = (SAMPLE_FEED.copy(), SAMPLE_ITEMS.copy())
+        mock_fetch_url.return_value.status_code = 200
+        mock_fetch_url.return_value.moved_to = None
+        mock_fetch_url.return_value.headers = {}
+        mock_fetch_url.return_value.digest = SAMPLE_DIGEST
+
+        user = User.objects.create_user(**SAMPLE_USER)
+        feed = Feed.objects.create(url='https://test.com', **SAMPLE_FEED)
+        feed.users.add(user)
+        # A concurrent update inserted one of the items right after the lookup of present items
+        Item.objects.create(feed=feed, **SAMPLE_ITEMS[0])
+        with mock.patch('django.db.models.QuerySet.values_list', side_effect=[[], [user.pk]]), \
+                self.captureOnCommitCallbacks(execute=True):
+            feed.update_items()
+
+        self.assertEqual(Item.objects.filter(feed=feed).count(), len(SAMPLE_ITEMS))
+        mock_increment.assert_not_called()
+        mock_invalidate.assert_called_once_with([user.pk])
+        self.assertIsNone(feed.last_published_at)
+
+    @mock.patch('apps.scraper.rss.fetch_url')
+    @mock.patch('apps.scraper.rss.parse_response')
+    def test_update_items_keeps_items_without_links(self, mock_parse_response: Mock, mock_fetch_url: Mock):
+        mock_parse_response.return_value = (SAMPLE_FEED.copy(), [
+            {**SAMPLE_ITEMS[0], 'link': None, 'title': f'Item {i}'} for i in range(3)
+        ])
+        mock_fetch_url.return_value.status_code = 200
+        mock_fetch_url.return_value.moved_to = None
+        mock_fetch_url.return_value.headers = {}
+        mock_fetch_url.return_value.digest = SAMPLE_DIGEST
+
+        feed = Feed.objects.create(url='https://test.com', **SAMPLE_FEED)
+        feed.update_items()
+
+        self.assertEqual(Item.objects.filter(feed=feed, link__isnull=True).count(), 3)
+
+    @override_settings(DIGICLOUD_CACHE_UNREAD_COUNTS=True)
+    @mock.patch('apps.scraper.unread.increment')
+    @mock.patch('apps.scraper.rss.fetch_url')
+    @mock.patch('apps.scraper.rss.parse_response')
+    def test_update_items_increments_unread_counters(self, mock_parse_response: Mock, mock_fetch_url: Mock,
+                                                     mock_increment: Mock):
+        mock_parse_response.return_value = (SAMPLE_FEED.copy(), SAMPLE_ITEMS.copy())
+        mock_fetch_url.return_value.status_code = 200
+        mock_fetch_url.return_value.moved_to = None
+        mock_fetch_url.return_value.headers = {}
+        mock_fetch_url.return_value.digest = SAMPLE_DIGEST
+
+        user = User.objects.create_user(**SAMPLE_USER)
+        feed = Feed.objects.create(url='https://test.com', **SAMPLE_FEED)
+        feed.users.add(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            feed.update_items()
+
+        mock_increment.assert_called_once_with([user.pk], len(SAMPLE_ITEMS))
+
+    @mock.patch('apps.scraper.rss.fetch_url')
+    @mock.patch('apps.scraper.rss.parse_response')
+    def test_update_items_closes_response(self, mock_parse_response: Mock, mock_fetch_url: Mock):
+        mock_parse_response.side_effect = ValueError()
+        mock_fetch_url.return_value.status_code = 200
+        mock_fetch_url.return_value.moved_to = None
+        mock_fetch_url.return_value.headers = {}
+        mock_fetch_url.return_value.digest = SAMPLE_DIGEST
+
+        feed = Feed.objects.create(url='https://test.com', **SAMPLE_FEED)
+        with self.assertRaises(ValueError):
+            feed.update_items()
+
+        mock_fetch_url.return_value.close.assert_called_once()
+
+    @override_settings(DIGICLOUD_CACHE_UNREAD_COUNTS=True)
+    @mock.patch('apps.scraper.unread.invalidate')
+    @mock.patch('apps.scraper.unread.increment')
+    @mock.patch('apps.scraper.rss.fetch_url')
+    @mock.patch('apps.scraper.rss.parse_response')
+    def test_update_items_skips_counters_under_watermarks(self, mock_parse_response: Mock, mock_fetch_url: Mock,
+                                                          mock_increment: Mock, mock_invalidate: Mock):
+        mock_parse_response.return_value = (SAMPLE_FEED.copy(), [
+            {**SAMPLE_ITEMS[0], 'pubDate': now() - timedelta(days=2)},
+        ])
+        mock_fetch_url.return_value.status_code = 200
+        mock_fetch_url.return_value.moved_to = None
+        mock_fetch_url.return_value.headers = {}
+        mock_fetch_url.return_value.digest = SAMPLE_DIGEST
+
+        user = User.objects.create_user(**SAMPLE_USER)
+        caught_up_user = User.objects.create_user(username='another', email='another@john.com')
+        feed = Feed.objects.create(url='https://test.com', **SAMPLE_FEED)
+        Subscription.objects.create(user=user, feed=feed, read_until=now() - timedelta(days=3))
+        Subscription.objects.create(user=caught_up_user, feed=feed, read_until=now() - timedelta(days=1))
+        with self.captureOnCommitCallbacks(execute=True):
+            feed.update_items()
+
+        mock_increment.assert_called_once_with([user.pk], 1)
+        mock_invalidate.assert_called_once_with([caught_up_user.pk])
+
+    @mock.patch('apps.scraper.rss.fetch_url')
+    @mock.patch('apps.scraper.rss.parse_response')
+    def test_update_items_stores_validators(self, mock_parse_response: Mock, mock_fetch_url: Mock):
+        mock_parse_response.return_value = (SAMPLE_FEED.copy(), SAMPLE_ITEMS.copy())
+        mock_fetch_url.return_value.status_code = 200
+        mock_fetch_url.return_value.moved_to = None
+        mock_fetch_url.return_value.headers = {
+            'ETag': '"abc"',
+            'Last-Modified': 'Tue, 19 Oct 2004 13:39:14 GMT',
+        }
+        mock_fetch_url.return_value.digest = SAMPLE_DIGEST
+
+        feed = Feed(url='https://test.com', **SAMPLE_FEED)
+        feed.update_items()
+
+        feed.refresh_from_db()
+        self.assertEqual(feed.etag, '"abc"')
+        self.assertEqual(feed.last_modified, 'Tue, 19 Oct 2004 13:39:14 GMT')
+
+    @mock.patch('apps.scraper.rss.fetch_url')
+    @mock.patch('apps.scraper.rss.parse_response')
+    def test_update_items_not_modified(self, mock_parse_response: Mock, mock_fetch_url: Mock):
+        mock_fetch_url.return_value.status_code = 304
+        mock_fetch_url.return_value.moved_to = None
+        mock_fetch_url.return_value.headers = {}
+
+        url = 'https://test.com'
+        feed = Feed.objects.create(url=url, etag='"abc"', last_modified='Tue, 19 Oct 2004 13:39:14 GMT', **SAMPLE_FEED)
+        with mock.patch('apps.scraper.models.Feed.save') as mock_save:
+            feed.update_items()
+
+        mock_fetch_url.assert_called_once_with(url, etag='"abc"', last_modified='Tue, 19 Oct 2004 13:39:14 GMT')
+        mock_parse_response.assert_not_called()
+        mock_save.assert_not_called()
+        self.assertFalse(Item.objects.exists())
+
+    @mock.patch('apps.scraper.rss.fetch_url')
+    @mock.patch('apps.scraper.rss.parse_response')
+    def test_update_items_unchanged_content(self, mock_parse_response: Mock, mock_fetch_url: Mock):
+        mock_fetch_url.return_value.status_code = 200
+        mock_fetch_url.return_value.moved_to = None
+        mock_fetch_url.return_value.headers = {}
+        mock_fetch_url.return_value.digest = SAMPLE_DIGEST
+
+        feed = Feed.objects.create(
+            url='https://test.com',
+            content_digest=SAMPLE_DIGEST,
+            **SAMPLE_FEED
+        )
+        with mock.patch('apps.scraper.models.Feed.save') as mock_save:
+            feed.update_items()
+
+        mock_parse_response.assert_not_called()
+        mock_save.assert_not_called()
+        self.assertFalse(Item.objects.exists())
+
+    @mock.patch('apps.scraper.stats.increment')
+    @mock.patch('apps.scraper.rss.fetch_url')
+    @mock.patch('apps.scraper.rss.parse_response')
+    def test_update_items_counts_skipped_updates(self, mock_parse_response: Mock, mock_fetch_url: Mock,
+                                                 mock_increment: Mock):
+        mock_parse_response.return_value = (SAMPLE_FEED.copy(), SAMPLE_ITEMS.copy())
+        mock_fetch_url.return_value.status_code = 200
+        mock_fetch_url.return_value.moved_to = None
+        mock_fetch_url.return_value.headers = {}
+        mock_fetch_url.return_value.digest = SAMPLE_DIGEST
+
+        feed = Feed(url='https://test.com', **SAMPLE_FEED)
+        feed.update_items()
+        feed.update_items()
+
+        mock_parse_response.assert_called_once()
+        self.assertListEqual(mock_increment.call_args_list, [
+            mock.call(stats.FEED_UPDATES_PROCESSED),
+            mock.call(stats.FEED_UPDATES_UNCHANGED),
+        ])
+
+    @mock.patch('apps.scraper.rss.fetch_url')
+    @mock.patch('apps.scraper.rss.parse_response')
+    def test_create_from_url(self, mock_parse_response: Mock, mock_fetch_url: Mock):
+        mock_parse_response.return_value = (SAMPLE_FEED.copy(), SAMPLE_ITEMS.copy())
+        mock_fetch_url.return_value.status_code = 200
+        mock_fetch_url.return_value.moved_to = None
+        mock_fetch_url.return_value.headers = {}
+        mock_fetch_url.return_value.digest = SAMPLE_DIGEST
         url = 'https://test.com'
         feed = Feed.objects.create_from_url(url)
 
-        mock_parse_url.assert_called_once_with(url)
-        mock_update_items.assert_called_once()
+        # The feed is only downloaded once, for both its own fields and its items
+        mock_fetch_url.assert_called_once_with(url, etag=None, last_modified=None)
+        self.assertEqual(feed.items.count(), len(SAMPLE_ITEMS))
 
         output_feed_dict = model_to_dict(feed)
-        for key in ['id', 'url', 'periodic_task', 'users']:
+        for key in ['id', 'url', 'periodic_task', 'users', 'etag', 'last_modified', 'content_digest',
+                    'update_interval', 'next_update_at', 'version', 'status', 'publish_interval', 'last_published_at',
+                    'not_before']:
             del output_feed_dict[key]
         self.assertDictEqual(
             output_feed_dict,
             SAMPLE_FEED
         )
+        self.assertEqual(feed.status, FEED_STATUS_ACTIVE)
 
         self.assertIsInstance(feed.periodic_task, PeriodicTask)
         self.assertIsInstance(feed.periodic_task.interval, IntervalSchedule)
@@ -63,6 +300,59 @@ class FeedModelTestCase(TestCase):
         self.assertEqual(feed.periodic_task.task, 'apps.scraper.tasks.update_feed')
         self.assertEqual(feed.periodic_task.args, f'[{feed.id}]')
 
+    @override_settings(DIGICLOUD_FEED_SCHEDULER='sweep')
+    @mock.patch('apps.scraper.models.Feed.update_items')
+    def test_create_from_url_sweep_scheduler(self, mock_update_items: Mock):
+        feed = Feed.objects.create_from_url('https://test.com')
+
+        feed.refresh_from_db()
+        self.assertIsNone(feed.periodic_task)
+        self.assertFalse(PeriodicTask.objects.filter(task='apps.scraper.tasks.update_feed').exists())
+        self.assertEqual(feed.interval, feed.expected_ttl)
+        self.assertGreater(feed.next_update_at, now())
+
+    @override_settings(DIGICLOUD_FEED_SCHEDULER='sweep')
+    @mock.patch('apps.scraper.models.Feed.update_items')
+    def test_initialize_sweep_scheduler_waits_until_available(self, mock_update_items: Mock):
+        feed = Feed.objects.create_from_url('https://test.com', fetch=False)
+        feed.not_before = now() + timedelta(days=1)
+        feed.initialize()
+
+        feed.refresh_from_db()
+        self.assertEqual(feed.next_update_at, feed.not_before)
+
+    @mock.patch('apps.scraper.models.Feed.update_items')
+    def test_create_from_url_without_fetching(self, mock_update_items: Mock):
+        feed = Feed.objects.create_from_url('https://test.com', fetch=False)
+
+        mock_update_items.assert_not_called()
+        self.assertEqual(feed.status, FEED_STATUS_PENDING)
+        self.assertIsNone(feed.periodic_task)
+        self.assertIsNone(feed.next_update_at)
+
+    def test_due_for_update(self):
+        due_feed = Feed.objects.create(url='https://test.com', next_update_at=now() - timedelta(minutes=1),
+                                       **SAMPLE_FEED)
+        Feed.objects.create(url='https://test2.com', next_update_at=now() + timedelta(minutes=1), **SAMPLE_FEED)
+        Feed.objects.create(url='https://test3.com', **SAMPLE_FEED)
+
+        self.assertListEqual(list(Feed.objects.due_for_update()), [due_feed])
+
+    def test_interval_without_periodic_task(self):
+        feed = Feed.objects.create(url='https://test.com', **SAMPLE_FEED)
+        self.assertEqual(feed.interval, feed.expected_ttl)
+
+        feed.interval = timedelta(minutes=30)
+        feed.refresh_from_db()
+        self.assertEqual(feed.interval, timedelta(minutes=30))
+
+    def test_schedule_next_update(self):
+        feed = Feed.objects.create(url='https://test.com', update_interval=timedelta(minutes=30), **SAMPLE_FEED)
+        feed.schedule_next_update()
+
+        feed.refresh_from_db()
+        self.assertAlmostEqual(feed.next_update_at, now() + timedelta(minutes=30), delta=timedelta(seconds=5))
+
     def test_expected_ttl_getter_fallback(self):
         feed = Feed()
         self.assertEqual(feed.expected_ttl, settings.DIGICLOUD_DEFAULT_FEED_UPDATE_INTERVAL)
@@ -100,3 +390,192 @@ class FeedModelTestCase(TestCase):
 
         allowed_feeds = Feed.objects.for_user(user).all()
         self.assertListEqual(list(allowed_feeds), [allowed_feed])
+
+    @mock.patch('apps.scraper.rss.fetch_url')
+    @mock.patch('apps.scraper.rss.parse_response')
+    def test_update_items_bumps_version(self, mock_parse_response: Mock, mock_fetch_url: Mock):
+        mock_parse_response.return_value = (SAMPLE_FEED.copy(), SAMPLE_ITEMS.copy())
+        mock_fetch_url.return_value.status_code = 200
+        mock_fetch_url.return_value.moved_to = None
+        mock_fetch_url.return_value.headers = {}
+        mock_fetch_url.return_value.digest = SAMPLE_DIGEST
+
+        feed = Feed.objects.create(url='https://test.com', **SAMPLE_FEED)
+        feed.update_items()
+        self.assertEqual(feed.version, 1)
+
+        # Unchanged content leaves the cached representations valid
+        feed.update_items()
+        self.assertEqual(feed.version, 1)
+
+        mock_fetch_url.return_value.digest = 'changed'
+        feed.update_items()
+        feed.refresh_from_db()
+        self.assertEqual(feed.version, 2)
+
+    @mock.patch('apps.scraper.models.Feed.initialize')
+    def test_get_or_create_from_url(self, mock_initialize: Mock):
+        feed = Feed.objects.get_or_create_from_url('HTTPS://Test.com/feed/?b=2&a=1&utm_source=test')
+        self.assertEqual(feed.url, 'https://test.com/feed/?b=2&a=1&utm_source=test')
+        self.assertListEqual(list(feed.aliases.values_list('canonical_url', flat=True)), ['test.com/feed?a=1&b=2'])
+
+        for url in ['https://test.com:443/feed/?b=2&a=1#top', 'http://test.com/feed?a=1&b=2']:
+            self.assertEqual(Feed.objects.get_or_create_from_url(url), feed)
+        mock_initialize.assert_called_once()
+
+    @mock.patch('apps.scraper.models.FeedManager.create_from_url')
+    def test_get_or_create_from_url_lost_race(self, mock_create_from_url: Mock):
+        existing_feed = Feed.objects.create(url='https://test.com/', **SAMPLE_FEED)
+        mock_create_from_url.side_effect = lambda url, fetch: Feed.objects.create(url=url, **SAMPLE_FEED)
+
+        with mock.patch('apps.scraper.models.FeedManager.get', side_effect=[Feed.DoesNotExist, existing_feed]):
+            feed = Feed.objects.get_or_create_from_url('https://test.com')
+
+        self.assertEqual(feed, existing_feed)
+        self.assertEqual(Feed.objects.count(), 1)
+
+    @mock.patch('apps.scraper.models.connection')
+    def test_get_or_create_from_url_locks_on_postgresql(self, mock_connection: Mock):
+        mock_connection.vendor = 'postgresql'
+        Feed.objects.create_from_url('https://test.com/', fetch=False)
+
+        Feed.objects.get_or_create_from_url('https://test.com')
+
+        mock_connection.cursor.return_value.__enter__.return_value.execute.assert_called_once_with(
+            'SELECT pg_advisory_xact_lock(hashtext(%s))',
+            ['scraper.feed:test.com'],
+        )
+
+    @mock.patch('apps.scraper.models.Feed.initialize')
+    def test_get_or_create_from_url_retries_failed_feeds(self, mock_initialize: Mock):
+        feed = Feed.objects.create_from_url('https://test.com/', fetch=False)
+        feed.status = FEED_STATUS_FAILED
+        feed.save()
+
+        Feed.objects.get_or_create_from_url('https://test.com', fetch=False)
+        mock_initialize.assert_not_called()
+
+        Feed.objects.get_or_create_from_url('https://test.com')
+        mock_initialize.assert_called_once()
+
+    @mock.patch('apps.scraper.rss.fetch_url')
+    @mock.patch('apps.scraper.rss.parse_response')
+    def test_update_items_follows_permanent_redirects(self, mock_parse_response: Mock, mock_fetch_url: Mock):
+        mock_parse_response.return_value = (SAMPLE_FEED.copy(), [])
+        mock_fetch_url.return_value.status_code = 200
+        mock_fetch_url.return_value.moved_to = 'https://new.test.com/feed'
+        mock_fetch_url.return_value.headers = {}
+        mock_fetch_url.return_value.digest = SAMPLE_DIGEST
+
+        feed = Feed.objects.create_from_url('https://test.com/feed', fetch=False)
+        feed.update_items()
+
+        feed.refresh_from_db()
+        self.assertEqual(feed.url, 'https://new.test.com/feed')
+        self.assertEqual(Feed.objects.get_or_create_from_url('https://test.com/feed', fetch=False), feed)
+        self.assertEqual(Feed.objects.get_or_create_from_url('https://new.test.com/feed/', fetch=False), feed)
+
+    def test_move_to_bumps_version(self):
+        feed = Feed.objects.create_from_url('https://test.com/feed', fetch=False)
+        version = feed.version
+
+        feed.move_to('https://new.test.com/feed')
+
+        self.assertEqual(feed.version, version + 1)
+        feed.refresh_from_db()
+        self.assertEqual(feed.version, version + 1)
+
+    def test_move_to_known_feed(self):
+        feed = Feed.objects.create_from_url('https://test.com/feed', fetch=False)
+        other_feed = Feed.objects.create_from_url('https://new.test.com/feed', fetch=False)
+
+        feed.move_to('https://new.test.com/feed')
+
+        feed.refresh_from_db()
+        self.assertEqual(feed.url, 'https://test.com/feed')
+        self.assertEqual(Feed.objects.get_or_create_from_url('https://new.test.com/feed', fetch=False), other_feed)
+
+    @override_settings(DIGICLOUD_ADAPTIVE_SMOOTHING=0.5)
+    def test_observe_publications(self):
+        feed = Feed(url='https://test.com', **SAMPLE_FEED)
+        date = now() - timedelta(days=1)
+
+        feed.observe_publications([
+            Item(pubDate=date),
+            Item(pubDate=date - timedelta(hours=4)),
+            Item(pubDate=date - timedelta(hours=6)),
+        ])
+        # The gaps are 2 and then 4 hours
+        self.assertEqual(feed.publish_interval, timedelta(hours=3))
+        self.assertEqual(feed.last_published_at, date)
+
+        # Late items are ignored, and undated ones count as published now
+        feed.observe_publications([Item(pubDate=date - timedelta(hours=1)), Item(pubDate=None)])
+        self.assertGreater(feed.publish_interval, timedelta(hours=13))
+        self.assertGreater(feed.last_published_at, date)
+
+    @override_settings(
+        DIGICLOUD_ADAPTIVE_MINIMUM_INTERVAL=timedelta(minutes=10),
+        DIGICLOUD_ADAPTIVE_MAXIMUM_INTERVAL=timedelta(hours=6),
+    )
+    def test_adaptive_interval(self):
+        feed = Feed(url='https://test.com', **SAMPLE_FEED)
+        feed.ttl = None
+        feed.last_published_at = now()
+
+        feed.publish_interval = timedelta(hours=2, seconds=10)
+        self.assertEqual(feed.adaptive_interval, timedelta(hours=2))
+        feed.publish_interval = timedelta(minutes=1)
+        self.assertEqual(feed.adaptive_interval, timedelta(minutes=10))
+        feed.publish_interval = timedelta(days=1)
+        self.assertEqual(feed.adaptive_interval, timedelta(hours=6))
+
+        # The <ttl> is respected, and so is the time since the latest item
+        feed.publish_interval = timedelta(minutes=1)
+        feed.ttl = timedelta(minutes=30)
+        self.assertEqual(feed.adaptive_interval, timedelta(minutes=30))
+        feed.last_published_at = now() - timedelta(hours=1)
+        self.assertEqual(feed.adaptive_interval, timedelta(hours=1))
+
+    def test_available_at(self):
+        feed = Feed(url='https://test.com', **SAMPLE_FEED)
+        # A Saturday
+        time = datetime(2021, 8, 14, 10, 30, tzinfo=timezone.utc)
+        self.assertEqual(feed.available_at(time), time)
+
+        feed.not_before = time + timedelta(minutes=10)
+        self.assertEqual(feed.available_at(time), feed.not_before)
+
+        feed.skipHours = [10, 11]
+        self.assertEqual(feed.available_at(time), datetime(2021, 8, 14, 12, tzinfo=timezone.utc))
+
+        feed.skipDays = ['Saturday', 'Sunday']
+        self.assertEqual(feed.available_at(time), datetime(2021, 8, 16, 0, tzinfo=timezone.utc))
+
+        feed.skipHours = list(range(24))
+        self.assertEqual(feed.available_at(time), feed.not_before)
+
+    @override_settings(DIGICLOUD_BACKOFF_MAXIMUM_DURATION=timedelta(hours=1))
+    def test_defer(self):
+        feed = Feed.objects.create(url='https://test.com', **SAMPLE_FEED)
+
+        feed.defer(now() + timedelta(days=7))
+        feed.refresh_from_db()
+        self.assertLessEqual(feed.not_before, now() + timedelta(hours=1))
+
+        feed.defer(None)
+        feed.refresh_from_db()
+        self.assertIsNone(feed.not_before)
+
+    @mock.patch('apps.scraper.rss.fetch_url')
+    def test_update_items_defers_until_fresh(self, mock_fetch_url: Mock):
+        mock_fetch_url.return_value.status_code = 304
+        mock_fetch_url.return_value.moved_to = None
+        mock_fetch_url.return_value.headers = {'Cache-Control': 'max-age=3600'}
+
+        feed = Feed.objects.create(url='https://test.com', update_interval=timedelta(minutes=5), **SAMPLE_FEED)
+        feed.update_items()
+        feed.schedule_next_update()
+
+        feed.refresh_from_db()
+        self.assertGreater(feed.next_update_at, now() + timedelta(minutes=55))
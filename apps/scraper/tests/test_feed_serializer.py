@@ -0,0 +1,29 @@
+from django.test import TestCase
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.scraper.models import Feed, Item
+from apps.scraper.serializers import FeedSerializer
+from apps.scraper.tests import SAMPLE_FEED
+
+
+class FeedSerializerTestCase(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory(SERVER_NAME='localhost')
+        self.feed = Feed.objects.create(url='https://test.com', **SAMPLE_FEED)
+        Item.objects.create(feed=self.feed, link='https://test.com/1')
+        Item.objects.create(feed=self.feed, link='https://test.com/2')
+
+    def _serialize(self, params=None):
+        request = Request(self.factory.get('/api/feeds/', params))
+        return FeedSerializer(self.feed, context={'request': request}).data
+
+    def test_items_are_omitted_by_default(self):
+        data = self._serialize()
+        self.assertNotIn('items', data)
+        self.assertEqual(data['item_count'], 2)
+        self.assertEqual(data['items_url'], f'http://localhost/api/items/?feed={self.feed.pk}')
+
+    def test_items_are_included_when_asked_for(self):
+        data = self._serialize({'include': 'items'})
+        self.assertEqual(len(data['items']), 2)
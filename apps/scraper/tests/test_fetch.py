@@ -0,0 +1,53 @@
+import threading
+import time
+from unittest import mock
+from unittest.mock import Mock
+
+from django.test import TestCase, override_settings
+from requests import RequestException
+
+from apps.scraper.fetch import fetch_feeds
+from apps.scraper.models import Feed
+
+
+class FetchFeedsTestCase(TestCase):
+
+    @mock.patch('apps.scraper.rss.fetch_url')
+    def test_fetch_feeds_results(self, mock_fetch_url: Mock):
+        response = Mock()
+        error = RequestException()
+        mock_fetch_url.side_effect = [response, error]
+        feeds = [
+            Feed(url='https://test.com', etag='"abc"'),
+            Feed(url='https://test2.com', last_modified='Tue, 19 Oct 2004 13:39:14 GMT'),
+        ]
+
+        results = fetch_feeds(feeds)
+
+        self.assertEqual(results, [(feeds[0], response), (feeds[1], error)])
+        self.assertEqual(mock_fetch_url.call_count, 2)
+        self.assertEqual(mock_fetch_url.call_args_list[0].kwargs['etag'], '"abc"')
+        self.assertEqual(
+            mock_fetch_url.call_args_list[1].kwargs['last_modified'],
+            'Tue, 19 Oct 2004 13:39:14 GMT',
+        )
+
+    @override_settings(DIGICLOUD_FETCH_CONCURRENCY=8, DIGICLOUD_FETCH_PER_HOST_CONCURRENCY=2)
+    @mock.patch('apps.scraper.rss.fetch_url')
+    def test_fetch_feeds_per_host_limit(self, mock_fetch_url: Mock):
+        lock = threading.Lock()
+        in_flight = {'current': 0, 'maximum': 0}
+
+        def fake_fetch_url(*args, **kwargs):
+            with lock:
+                in_flight['current'] += 1
+                in_flight['maximum'] = max(in_flight['maximum'], in_flight['current'])
+            time.sleep(0.01)
+            with lock:
+                in_flight['current'] -= 1
+
+        mock_fetch_url.side_effect = fake_fetch_url
+        fetch_feeds([Feed(url=f'https://test.com/{i}') for i in range(6)])
+
+        self.assertEqual(mock_fetch_url.call_count, 6)
+        self.assertLessEqual(in_flight['maximum'], 2)
@@ -0,0 +1,76 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils.timezone import now
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.authentication.models import User
+from apps.authentication.tests import SAMPLE_USER
+from apps.scraper.filters import ItemFilterBackend
+from apps.scraper.models import Feed, Item, Interaction, Subscription, TimelineEntry
+from apps.scraper.tests import SAMPLE_FEED
+from apps.scraper.views import ItemViewSet
+
+
+class ItemFilterBackendTestCase(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.user = User.objects.create_user(**SAMPLE_USER)
+        self.feed = Feed.objects.create(url='https://test.com', **SAMPLE_FEED)
+        self.other_feed = Feed.objects.create(url='https://other.com', **SAMPLE_FEED)
+        self.date = now()
+        self.item = Item.objects.create(feed=self.feed, link='https://test.com/1', pubDate=self.date)
+        self.old_item = Item.objects.create(
+            feed=self.other_feed,
+            link='https://other.com/1',
+            pubDate=self.date - timedelta(days=2),
+        )
+
+    def _filter(self, params, queryset=None, action='list'):
+        request = self.factory.get('/api/items/', params)
+        force_authenticate(request, self.user)
+        view = ItemViewSet()
+        view.action = action
+        view.request = Request(request)
+        return ItemFilterBackend().filter_queryset(view.request, queryset or Item.objects.all(), view)
+
+    def test_no_filters(self):
+        self.assertEqual(self._filter({}).count(), 2)
+
+    def test_filter_by_feed(self):
+        self.assertEqual(list(self._filter({'feed': self.feed.pk})), [self.item])
+
+    def test_invalid_feed(self):
+        with self.assertRaises(ValidationError):
+            self._filter({'feed': 'test'})
+
+    def test_filter_by_date_range(self):
+        since = (self.date - timedelta(days=3)).isoformat()
+        until = (self.date - timedelta(days=1)).isoformat()
+        self.assertEqual(list(self._filter({'since': since, 'until': until})), [self.old_item])
+        self.assertEqual(list(self._filter({'since': self.date.isoformat()})), [self.item])
+
+    def test_since_after_until(self):
+        with self.assertRaises(ValidationError):
+            self._filter({'since': self.date.isoformat(), 'until': (self.date - timedelta(days=1)).isoformat()})
+
+    def test_filter_unread(self):
+        Interaction.objects.create(user=self.user, item=self.item)
+        self.assertEqual(list(self._filter({'unread': 'true'})), [self.old_item])
+        self.assertEqual(self._filter({'unread': 'false'}).count(), 2)
+
+    def test_filter_bookmarked(self):
+        Interaction.objects.create(user=self.user, item=self.item, date_bookmarked=self.date)
+        Interaction.objects.create(user=self.user, item=self.old_item)
+        self.assertEqual(list(self._filter({'bookmarked': 'true'})), [self.item])
+
+    @override_settings(DIGICLOUD_TIMELINE_FAN_OUT='write')
+    def test_filter_timeline_by_date(self):
+        Subscription.objects.create(user=self.user, feed=self.feed)
+        Subscription.objects.create(user=self.user, feed=self.other_feed)
+        self.assertEqual(TimelineEntry.objects.filter(user=self.user).count(), 2)
+
+        queryset = self._filter({'since': self.date.isoformat()}, Item.objects.timeline(self.user))
+        self.assertEqual(list(queryset), [self.item])
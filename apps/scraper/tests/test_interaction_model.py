@@ -1,10 +1,14 @@
+from datetime import timedelta
 from unittest import mock
 from unittest.mock import Mock
 
 from django.test import TestCase
 from django.utils.timezone import now
 
-from apps.scraper.models import Interaction
+from apps.authentication.models import User
+from apps.authentication.tests import SAMPLE_USER
+from apps.scraper.models import Interaction, Feed, Item, Subscription
+from apps.scraper.tests import SAMPLE_FEED
 
 
 class InteractionModelTestCase(TestCase):
@@ -24,3 +28,92 @@ class InteractionModelTestCase(TestCase):
 
         self.assertIsNone(interaction.date_bookmarked)
         mock_save.assert_called_once()
+
+    def test_insert_seen(self):
+        user = User.objects.create(**SAMPLE_USER)
+        feed = Feed.objects.create(url='https://test.com', **SAMPLE_FEED)
+        item = Item.objects.create(feed=feed, link='https://test.com/1')
+        seen_item = Item.objects.create(feed=feed, link='https://test.com/2')
+        Interaction.objects.create(user=user, item=seen_item)
+        date_seen = now() - timedelta(minutes=1)
+
+        inserted = Interaction.objects.insert_seen([
+            (user.pk, item.pk, date_seen),
+            (user.pk, seen_item.pk, date_seen),
+            (user.pk, 0, date_seen),  # Deleted in the meantime
+        ])
+
+        self.assertEqual(inserted, 1)
+        self.assertEqual(Interaction.objects.count(), 2)
+        self.assertEqual(Interaction.objects.get(item=item).date_seen, date_seen)
+
+    def test_insert_seen_in_batches(self):
+        user = User.objects.create(**SAMPLE_USER)
+        feed = Feed.objects.create(url='https://test.com', **SAMPLE_FEED)
+        Item.objects.bulk_create([Item(feed=feed, link=f'https://test.com/{i}') for i in range(5)])
+        events = [(user.pk, item_pk, now()) for item_pk in Item.objects.values_list('pk', flat=True)]
+
+        with self.assertNumQueries(3):
+            inserted = Interaction.objects.insert_seen(events, batch_size=2)
+
+        self.assertEqual(inserted, 5)
+        self.assertEqual(Interaction.objects.filter(user=user).count(), 5)
+
+    @mock.patch('apps.scraper.seen.pending')
+    @mock.patch('apps.scraper.unread.invalidate')
+    def test_bulk_interact(self, mock_invalidate: Mock, mock_pending: Mock):
+        user = User.objects.create(**SAMPLE_USER)
+        feed = Feed.objects.create(url='https://test.com', **SAMPLE_FEED)
+        other_feed = Feed.objects.create(url='https://test2.com', **SAMPLE_FEED)
+        Subscription.objects.create(user=user, feed=feed, read_until=now() - timedelta(hours=1))
+        new_item, seen_item, bookmarked_item, pending_item = (
+            Item.objects.create(feed=feed, link=f'https://test.com/{i}') for i in range(4)
+        )
+        read_item = Item.objects.create(feed=feed, link='https://test.com/read', pubDate=now() - timedelta(days=1))
+        other_item = Item.objects.create(feed=other_feed)
+        Interaction.objects.create(user=user, item=seen_item)
+        Interaction.objects.create(user=user, item=bookmarked_item, date_bookmarked=now())
+        mock_pending.return_value = [pending_item.pk]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertNumQueries(5):
+                found_item_pks, changed = Interaction.objects.bulk_interact(
+                    user,
+                    seen=[new_item.pk, seen_item.pk, pending_item.pk, read_item.pk, other_item.pk],
+                    bookmark=[new_item.pk, seen_item.pk, bookmarked_item.pk],
+                    unbookmark=[0],
+                )
+
+        self.assertSetEqual(found_item_pks, {new_item.pk, seen_item.pk, bookmarked_item.pk, pending_item.pk,
+                                             read_item.pk})
+        # Items seen through a pending event or the read watermark are left alone
+        self.assertDictEqual(changed, {
+            'seen': {new_item.pk},
+            'bookmark': {new_item.pk, seen_item.pk},
+            'unbookmark': set(),
+        })
+        self.assertEqual(Interaction.objects.filter(user=user, date_bookmarked__isnull=False).count(), 3)
+        self.assertFalse(Interaction.objects.filter(item__in=[other_item, pending_item, read_item]).exists())
+        mock_invalidate.assert_called_once_with([user.pk])
+
+        found_item_pks, changed = Interaction.objects.bulk_interact(user, unbookmark=[new_item.pk])
+        self.assertSetEqual(changed['unbookmark'], {new_item.pk})
+        self.assertIsNone(Interaction.objects.get(item=new_item).date_bookmarked)
+
+    def test_bulk_interact_bookmarks_concurrently_created_interactions(self):
+        user = User.objects.create(**SAMPLE_USER)
+        feed = Feed.objects.create(url='https://test.com', **SAMPLE_FEED)
+        feed.users.add(user)
+        item = Item.objects.create(feed=feed, link='https://test.com/1')
+        bulk_create = Interaction.objects.bulk_create
+
+        def bulk_create_after_view(*args, **kwargs):
+            # A concurrent view of the item inserts its interaction first
+            Interaction.objects.create(user=user, item=item)
+            return bulk_create(*args, **kwargs)
+
+        with mock.patch.object(Interaction.objects, 'bulk_create', side_effect=bulk_create_after_view):
+            _, changed = Interaction.objects.bulk_interact(user, bookmark=[item.pk])
+
+        self.assertSetEqual(changed['bookmark'], {item.pk})
+        self.assertIsNotNone(Interaction.objects.get(user=user, item=item).date_bookmarked)
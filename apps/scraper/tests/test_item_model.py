@@ -1,4 +1,8 @@
-from django.test import TestCase
+from unittest import mock
+from unittest.mock import Mock
+
+from django.db import IntegrityError
+from django.test import TestCase, override_settings
 from django.utils.timezone import now
 
 from apps.authentication.models import User
@@ -48,6 +52,11 @@ class ItemModelTestCase(TestCase):
         item.user_interactions = [Interaction(comment="test")]
         self.assertEqual(item.comment, "test")
 
+    def test_comment_without_interaction(self):
+        item = Item()
+        item.user_interactions = []
+        self.assertIsNone(item.comment)
+
     def test_for_user_scope(self):
         user = User.objects.create(**SAMPLE_USER)
         allowed_feed = Feed.objects.create(url='https://test.com', **SAMPLE_FEED)
@@ -67,6 +76,23 @@ class ItemModelTestCase(TestCase):
         allowed_items = Item.objects.for_user(user).all()
         self.assertListEqual(list(allowed_items), [allowed_item])
 
+    def test_user_annotations(self):
+        user = User.objects.create(**SAMPLE_USER)
+        feed = Feed.objects.create(url='https://test.com', **SAMPLE_FEED)
+        feed.users.add(user)
+        bookmarked_item = Item.objects.create(feed=feed, link='https://test.com/1')
+        unseen_item = Item.objects.create(feed=feed, link='https://test.com/2')
+        Interaction.objects.create(user=user, item=bookmarked_item, date_bookmarked=now(), comment='test')
+
+        with self.assertNumQueries(1):
+            items = {item.pk: item for item in Item.objects.for_user(user)}
+            self.assertTrue(items[bookmarked_item.pk].is_seen)
+            self.assertTrue(items[bookmarked_item.pk].is_bookmarked)
+            self.assertEqual(items[bookmarked_item.pk].comment, 'test')
+            self.assertFalse(items[unseen_item.pk].is_seen)
+            self.assertFalse(items[unseen_item.pk].is_bookmarked)
+            self.assertIsNone(items[unseen_item.pk].comment)
+
     def test_bookmarks_scope(self):
         user = User.objects.create(**SAMPLE_USER)
         feed = Feed.objects.create(url='https://test.com', **SAMPLE_FEED)
@@ -125,6 +151,54 @@ class ItemModelTestCase(TestCase):
 
         self.assertEqual(Item.objects.unread_item_count(user), 2)
 
+    def test_unread_count_ignores_unsubscribed_feeds(self):
+        user = User.objects.create(**SAMPLE_USER)
+        feed = Feed.objects.create(url='https://test.com', **SAMPLE_FEED)
+        unsubscribed_feed = Feed.objects.create(url='https://test2.com', **SAMPLE_FEED)
+        Item.objects.create(feed=feed)
+        seen_item = Item.objects.create(feed=feed)
+        seen_unsubscribed_item = Item.objects.create(feed=unsubscribed_feed)
+        Interaction.objects.create(user=user, item=seen_item)
+        Interaction.objects.create(user=user, item=seen_unsubscribed_item)
+        Subscription.objects.create(user=user, feed=feed)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(Item.objects.unread_item_count(user), 1)
+
+    @mock.patch('apps.scraper.unread.store')
+    @mock.patch('apps.scraper.unread.get')
+    @mock.patch('apps.scraper.models.ItemQuerySet.unread_item_count')
+    def test_cached_unread_count_miss(self, mock_unread_item_count: Mock, mock_get: Mock, mock_store: Mock):
+        user = User.objects.create(**SAMPLE_USER)
+        mock_get.return_value = None
+        mock_unread_item_count.return_value = 3
+
+        self.assertEqual(Item.objects.cached_unread_item_count(user), 3)
+        mock_store.assert_called_once_with(user.pk, 3)
+
+    @mock.patch('apps.scraper.unread.get')
+    @mock.patch('apps.scraper.models.ItemQuerySet.unread_item_count')
+    def test_cached_unread_count_hit(self, mock_unread_item_count: Mock, mock_get: Mock):
+        user = User.objects.create(**SAMPLE_USER)
+        mock_get.return_value = 7
+
+        self.assertEqual(Item.objects.cached_unread_item_count(user), 7)
+        mock_unread_item_count.assert_not_called()
+
+    @mock.patch('apps.scraper.unread.increment')
+    def test_interact_with_user_decrements_unread_counter(self, mock_increment: Mock):
+        user = User.objects.create(**SAMPLE_USER)
+        feed = Feed.objects.create(url='https://test.com', **SAMPLE_FEED)
+        item = Item.objects.create(
+            feed=feed
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            item.interact_with_user(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            item.interact_with_user(user)
+
+        mock_increment.assert_called_once_with([user.pk], -1)
+
     def test_new_interact_with_user(self):
         user = User.objects.create(**SAMPLE_USER)
         feed = Feed.objects.create(url='https://test.com', **SAMPLE_FEED)
@@ -148,3 +222,81 @@ class ItemModelTestCase(TestCase):
         )
         new_interaction = item.interact_with_user(user)
         self.assertEqual(new_interaction, current_interaction)
+
+    @mock.patch('apps.scraper.unread.increment')
+    def test_mark_seen(self, mock_increment: Mock):
+        user = User.objects.create(**SAMPLE_USER)
+        feed = Feed.objects.create(url='https://test.com', **SAMPLE_FEED)
+        item = Item.objects.create(feed=feed)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertNumQueries(1):
+                self.assertTrue(item.mark_seen(user))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertFalse(item.mark_seen(user))
+
+        self.assertTrue(item.is_seen)
+        interaction = Interaction.objects.get(user=user, item=item)
+        self.assertIsNotNone(interaction.date_seen)
+        mock_increment.assert_called_once_with([user.pk], -1)
+
+    def test_interactions_are_unique(self):
+        user = User.objects.create(**SAMPLE_USER)
+        feed = Feed.objects.create(url='https://test.com', **SAMPLE_FEED)
+        item = Item.objects.create(feed=feed)
+        Interaction.objects.create(user=user, item=item)
+
+        with self.assertRaises(IntegrityError):
+            Interaction.objects.create(user=user, item=item)
+
+    @override_settings(DIGICLOUD_BUFFER_SEEN_EVENTS=True)
+    @mock.patch('apps.scraper.unread.increment')
+    @mock.patch('apps.scraper.seen.pending', Mock(return_value=[]))
+    @mock.patch('apps.scraper.seen.record')
+    def test_mark_seen_buffered(self, mock_record: Mock, mock_increment: Mock):
+        user = User.objects.create(**SAMPLE_USER)
+        feed = Feed.objects.create(url='https://test.com', **SAMPLE_FEED)
+        item = Item.objects.create(feed=feed)
+        mock_record.return_value = True
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(item.mark_seen(user))
+        self.assertFalse(Interaction.objects.exists())
+        mock_increment.assert_called_once_with([user.pk], -1)
+
+        # Already seen before the buffered event
+        Interaction.objects.create(user=user, item=item)
+        item = Item.objects.with_user_annotations(user).get(pk=item.pk)
+        with self.assertNumQueries(0):
+            self.assertFalse(item.mark_seen(user))
+
+    @override_settings(DIGICLOUD_BUFFER_SEEN_EVENTS=True)
+    @mock.patch('apps.scraper.seen.pending')
+    def test_pending_seen_events_are_merged(self, mock_pending: Mock):
+        user = User.objects.create(**SAMPLE_USER)
+        feed = Feed.objects.create(url='https://test.com', **SAMPLE_FEED)
+        feed.users.add(user)
+        Subscription.objects.create(user=user, feed=feed)
+        pending_item = Item.objects.create(feed=feed, link='https://test.com/1')
+        unseen_item = Item.objects.create(feed=feed, link='https://test.com/2')
+        mock_pending.return_value = [pending_item.pk]
+
+        items = {item.pk: item for item in Item.objects.for_user(user)}
+        self.assertTrue(items[pending_item.pk].is_seen)
+        self.assertFalse(items[unseen_item.pk].is_seen)
+        self.assertListEqual(list(Item.objects.unread(user)), [unseen_item])
+        self.assertEqual(Item.objects.unread_item_count(user), 1)
+
+    @override_settings(DIGICLOUD_BUFFER_SEEN_EVENTS=True)
+    @mock.patch('apps.scraper.unread.increment')
+    @mock.patch('apps.scraper.seen.discard')
+    def test_interact_with_user_writes_buffered_event(self, mock_discard: Mock, mock_increment: Mock):
+        user = User.objects.create(**SAMPLE_USER)
+        feed = Feed.objects.create(url='https://test.com', **SAMPLE_FEED)
+        item = Item.objects.create(feed=feed)
+        mock_discard.return_value = True
+
+        with self.captureOnCommitCallbacks(execute=True):
+            item.interact_with_user(user)
+        mock_discard.assert_called_once_with(user.pk, item.pk)
+        mock_increment.assert_not_called()
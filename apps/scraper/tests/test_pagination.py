@@ -0,0 +1,51 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils.timezone import now
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.scraper.models import Feed, Item
+from apps.scraper.pagination import KeysetPagination
+from apps.scraper.tests import SAMPLE_FEED
+
+
+class KeysetPaginationTestCase(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        feed = Feed.objects.create(url='https://test.com', **SAMPLE_FEED)
+        date = now()
+        self.items = [
+            Item.objects.create(feed=feed, link='https://test.com/1', pubDate=date),
+            Item.objects.create(feed=feed, link='https://test.com/2', pubDate=date - timedelta(days=1)),
+            Item.objects.create(feed=feed, link='https://test.com/3', pubDate=date - timedelta(days=1)),
+            Item.objects.create(feed=feed, link='https://test.com/4'),
+            Item.objects.create(feed=feed, link='https://test.com/5'),
+        ]
+
+    def _paginate(self, url):
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(Item.objects.all(), Request(self.factory.get(url)))
+        return page, paginator.get_next_link()
+
+    def test_pages_follow_the_timeline_order(self):
+        expected = [self.items[4], self.items[3], self.items[0], self.items[2], self.items[1]]
+        url = '/api/items/?cursor=&limit=2'
+        output = []
+        pages = 0
+        while url is not None:
+            page, url = self._paginate(url)
+            output.extend(page)
+            pages += 1
+
+        self.assertListEqual(output, expected)
+        self.assertEqual(pages, 3)
+
+    def test_no_count_query(self):
+        with self.assertNumQueries(1):
+            self._paginate('/api/items/?cursor=&limit=2')
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(NotFound):
+            self._paginate('/api/items/?cursor=invalid')
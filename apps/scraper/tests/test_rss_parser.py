@@ -1,10 +1,16 @@
+import hashlib
+from datetime import timedelta, datetime, timezone
 from unittest import mock
 from unittest.mock import Mock
 
 from bs4 import BeautifulSoup
-from django.test import TestCase
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.utils.timezone import now
+from requests import Timeout, HTTPError
 
-from apps.scraper.rss import _parse_categories, _parse_image, _PARSER_NAME, _parse_content, _parse_enclosure, parse_url
+from apps.scraper.rss import _parse_categories, _parse_image, _PARSER_NAME, _parse_content, _parse_enclosure, \
+    parse_url, _parse_soup_content, fetch_url, ResponseTooLarge, fresh_until, retry_after
 from apps.scraper.tests import SAMPLE_XML, SAMPLE_FEED, SAMPLE_ITEMS
 
 
@@ -115,11 +121,183 @@ class RssParserTestCase(TestCase):
             SAMPLE_ITEMS
         )
 
+    @mock.patch('apps.scraper.rss._parse_soup_content')
+    def test_parse_content_streaming(self, mock_parse_soup_content: Mock):
+        _parse_content(SAMPLE_XML)
+
+        mock_parse_soup_content.assert_not_called()
+
+    def test_parse_soup_content(self):
+        output_feed, output_items = _parse_soup_content(SAMPLE_XML)
+
+        self.assertDictEqual(
+            output_feed,
+            SAMPLE_FEED
+        )
+        self.assertListEqual(
+            output_items,
+            SAMPLE_ITEMS
+        )
+
+    def test_parse_content_falls_back_on_malformed_xml(self):
+        # The closing tag of the last item is missing, so the streaming parser rejects the document
+        malformed_xml = SAMPLE_XML.replace('</item>\n    </channel>', '\n    </channel>')
+        with mock.patch('apps.scraper.rss._parse_soup_content', wraps=_parse_soup_content) as mock_parse_soup_content:
+            output_feed, output_items = _parse_content(malformed_xml)
+
+        mock_parse_soup_content.assert_called_once_with(malformed_xml)
+        self.assertEqual(output_feed['title'], SAMPLE_FEED['title'])
+        self.assertEqual(output_items[0], SAMPLE_ITEMS[0])
+
     @mock.patch('requests.get')
-    @mock.patch('apps.scraper.rss._parse_content')
-    def test_parse_url(self, mock_parse_content: Mock, mock_requests_get: Mock):
+    def test_parse_url(self, mock_requests_get: Mock):
+        mock_requests_get.return_value.status_code = 200
+        mock_requests_get.return_value.headers = {}
+        mock_requests_get.return_value.iter_content.return_value = [SAMPLE_XML.encode()]
+
         url = 'https://test.com'
-        parse_url(url)
+        output_feed, output_items = parse_url(url)
+
+        mock_requests_get.assert_called_once_with(
+            url,
+            headers={},
+            timeout=settings.DIGICLOUD_FETCH_TIMEOUT,
+            stream=True,
+        )
+        self.assertDictEqual(output_feed, SAMPLE_FEED)
+        self.assertListEqual(output_items, SAMPLE_ITEMS)
+
+    @mock.patch('requests.get')
+    def test_fetch_url_sends_validators(self, mock_requests_get: Mock):
+        mock_requests_get.return_value.status_code = 304
+
+        url = 'https://test.com'
+        response = fetch_url(url, etag='"abc"', last_modified='Tue, 19 Oct 2004 13:39:14 GMT')
+
+        mock_requests_get.assert_called_once_with(url, headers={
+            'If-None-Match': '"abc"',
+            'If-Modified-Since': 'Tue, 19 Oct 2004 13:39:14 GMT',
+        }, timeout=settings.DIGICLOUD_FETCH_TIMEOUT, stream=True)
+        mock_requests_get.return_value.iter_content.assert_not_called()
+        self.assertIsNone(response.body)
+
+    def test_parse_skip_hours_and_days(self):
+        data = """
+        <rss version="2.0">
+            <channel>
+                <title>Test</title>
+                <link>https://test.com</link>
+                <description>Test</description>
+                <skipHours><hour>0</hour><hour> 1 </hour><hour>24</hour><hour>noon</hour></skipHours>
+                <skipDays><day>Saturday</day><day>Someday</day></skipDays>
+            </channel>
+        </rss>
+        """
+        for feed, _ in (_parse_content(data), _parse_soup_content(data)):
+            self.assertListEqual(feed['skipHours'], [0, 1])
+            self.assertListEqual(feed['skipDays'], ['Saturday'])
+
+    def test_fresh_until(self):
+        self.assertIsNone(fresh_until({}))
+        self.assertIsNone(fresh_until({'Cache-Control': 'no-cache'}))
+
+        expected = now() + timedelta(seconds=240)
+        self.assertAlmostEqual(fresh_until({'Cache-Control': 'public, max-age=300', 'Age': '60'}), expected,
+                               delta=timedelta(seconds=5))
+        self.assertAlmostEqual(fresh_until({
+            'Date': 'Tue, 19 Oct 2004 13:00:00 GMT',
+            'Expires': 'Tue, 19 Oct 2004 13:04:00 GMT',
+        }), expected, delta=timedelta(seconds=5))
+        # max-age takes precedence over Expires
+        self.assertAlmostEqual(fresh_until({
+            'Cache-Control': 'max-age=240',
+            'Expires': 'Tue, 19 Oct 2004 13:04:00 GMT',
+        }), expected, delta=timedelta(seconds=5))
+
+    def test_retry_after(self):
+        self.assertAlmostEqual(retry_after(Mock(status_code=429, headers={'Retry-After': '120'})),
+                               now() + timedelta(seconds=120), delta=timedelta(seconds=5))
+        self.assertEqual(retry_after(Mock(status_code=503, headers={'Retry-After': 'Tue, 19 Oct 2004 13:00:00 GMT'})),
+                         datetime(2004, 10, 19, 13, tzinfo=timezone.utc))
+        self.assertIsNone(retry_after(Mock(status_code=503, headers={})))
+        self.assertIsNone(retry_after(Mock(status_code=500, headers={'Retry-After': '120'})))
+
+    @mock.patch('requests.get')
+    def test_fetch_url_raises_for_errors(self, mock_requests_get: Mock):
+        mock_requests_get.return_value.status_code = 503
+        mock_requests_get.return_value.raise_for_status.side_effect = HTTPError()
+
+        with self.assertRaises(HTTPError):
+            fetch_url('https://test.com')
+        mock_requests_get.return_value.iter_content.assert_not_called()
+
+    @mock.patch('requests.get')
+    def test_fetch_url_records_permanent_redirects(self, mock_requests_get: Mock):
+        mock_requests_get.return_value.status_code = 304
+        mock_requests_get.return_value.url = 'https://temporary.test.com'
+        mock_requests_get.return_value.history = [
+            Mock(status_code=301, url='https://test.com'),
+            Mock(status_code=308, url='https://www.test.com'),
+            Mock(status_code=302, url='https://new.test.com'),
+        ]
+
+        self.assertEqual(fetch_url('https://test.com').moved_to, 'https://new.test.com')
+
+        mock_requests_get.return_value.history[0].status_code = 307
+        self.assertIsNone(fetch_url('https://test.com').moved_to)
+
+    @override_settings(DIGICLOUD_FETCH_CHUNK_SIZE=16)
+    @mock.patch('requests.get')
+    def test_fetch_url_streams_body(self, mock_requests_get: Mock):
+        chunks = [b'  \n<?xml version="1.0"?>', b'<rss><channel>', b'</channel></rss>']
+        mock_requests_get.return_value.status_code = 200
+        mock_requests_get.return_value.headers = {}
+        mock_requests_get.return_value.iter_content.return_value = chunks
+
+        response = fetch_url('https://test.com')
+
+        mock_requests_get.return_value.iter_content.assert_called_once_with(chunk_size=16)
+        content = b''.join(chunks).lstrip()
+        self.assertEqual(response.body.read(), content)
+        self.assertEqual(response.digest, hashlib.sha256(content).hexdigest())
+
+    @override_settings(DIGICLOUD_FETCH_SPOOL_SIZE=16)
+    @mock.patch('requests.get')
+    def test_fetch_url_response_closes_body(self, mock_requests_get: Mock):
+        mock_requests_get.return_value.status_code = 200
+        mock_requests_get.return_value.headers = {'Content-Length': 'plenty'}
+        mock_requests_get.return_value.iter_content.return_value = [b'<rss><channel></channel></rss>']
+
+        with fetch_url('https://test.com') as response:
+            self.assertFalse(response.body.closed)
+        self.assertTrue(response.body.closed)
+
+    @override_settings(DIGICLOUD_FETCH_MAXIMUM_SIZE=32)
+    @mock.patch('requests.get')
+    def test_fetch_url_size_limit(self, mock_requests_get: Mock):
+        mock_requests_get.return_value.status_code = 200
+        mock_requests_get.return_value.headers = {}
+        mock_requests_get.return_value.iter_content.return_value = [b'<rss>' + b' ' * 16, b' ' * 16 + b'</rss>']
+
+        with self.assertRaises(ResponseTooLarge):
+            fetch_url('https://test.com')
+
+    @override_settings(DIGICLOUD_FETCH_MAXIMUM_SIZE=32)
+    @mock.patch('requests.get')
+    def test_fetch_url_size_limit_from_headers(self, mock_requests_get: Mock):
+        mock_requests_get.return_value.status_code = 200
+        mock_requests_get.return_value.headers = {'Content-Length': '33'}
+
+        with self.assertRaises(ResponseTooLarge):
+            fetch_url('https://test.com')
+        mock_requests_get.return_value.iter_content.assert_not_called()
+
+    @override_settings(DIGICLOUD_FETCH_MAXIMUM_DURATION=timedelta())
+    @mock.patch('requests.get')
+    def test_fetch_url_deadline(self, mock_requests_get: Mock):
+        mock_requests_get.return_value.status_code = 200
+        mock_requests_get.return_value.headers = {}
+        mock_requests_get.return_value.iter_content.return_value = [b'<rss>', b'</rss>']
 
-        mock_parse_content.assert_called_once()
-        mock_requests_get.assert_called_once_with(url)
+        with self.assertRaises(Timeout):
+            fetch_url('https://test.com')
@@ -0,0 +1,79 @@
+from datetime import datetime, timezone
+from unittest import mock
+from unittest.mock import Mock
+
+import redis
+from django.test import TestCase, override_settings
+
+from apps.scraper import seen
+
+
+@override_settings(DIGICLOUD_BUFFER_SEEN_EVENTS=True)
+@mock.patch('apps.scraper.seen._redis')
+class SeenBufferTestCase(TestCase):
+
+    def test_record(self, mock_redis: Mock):
+        pipeline = mock_redis().pipeline().__enter__()
+        pipeline.execute.return_value = [1, 1]
+        time = datetime(2021, 8, 15, tzinfo=timezone.utc)
+
+        self.assertTrue(seen.record(1, 2, time))
+        pipeline.hsetnx.assert_called_once_with('scraper:seen:1', 2, time.timestamp())
+        pipeline.sadd.assert_called_once_with('scraper:seen-users', 1)
+
+    def test_record_existing(self, mock_redis: Mock):
+        mock_redis().pipeline().__enter__().execute.return_value = [0, 0]
+        self.assertFalse(seen.record(1, 2, datetime.now(timezone.utc)))
+
+    def test_record_failure(self, mock_redis: Mock):
+        mock_redis().pipeline().__enter__().execute.side_effect = redis.ConnectionError()
+        with self.assertLogs('apps.scraper.seen', 'WARNING'):
+            self.assertIsNone(seen.record(1, 2, datetime.now(timezone.utc)))
+
+    @override_settings(DIGICLOUD_BUFFER_SEEN_EVENTS=False)
+    def test_record_disabled(self, mock_redis: Mock):
+        self.assertIsNone(seen.record(1, 2, datetime.now(timezone.utc)))
+        mock_redis().pipeline.assert_not_called()
+
+    def test_discard(self, mock_redis: Mock):
+        mock_redis().hdel.return_value = 1
+        self.assertTrue(seen.discard(1, 2))
+        mock_redis().hdel.assert_called_once_with('scraper:seen:1', 2)
+
+    def test_pending(self, mock_redis: Mock):
+        mock_redis().hkeys.return_value = [b'2', b'3']
+        self.assertListEqual(seen.pending(1), [2, 3])
+
+    def test_pending_failure(self, mock_redis: Mock):
+        mock_redis().hkeys.side_effect = redis.ConnectionError()
+        with self.assertLogs('apps.scraper.seen', 'WARNING'):
+            self.assertListEqual(seen.pending(1), [])
+
+    @override_settings(DIGICLOUD_BUFFER_SEEN_EVENTS=False)
+    def test_pending_disabled(self, mock_redis: Mock):
+        self.assertListEqual(seen.pending(1), [])
+        mock_redis().hkeys.assert_not_called()
+
+    def test_drain(self, mock_redis: Mock):
+        time = datetime(2021, 8, 15, tzinfo=timezone.utc)
+        mock_redis().spop.return_value = [b'1', b'2']
+        pipeline = mock_redis().pipeline().__enter__()
+        pipeline.execute.return_value = [{b'3': str(time.timestamp()).encode()}, {}]
+
+        self.assertDictEqual(seen.drain(10), {1: {3: time}})
+        mock_redis().spop.assert_called_once_with('scraper:seen-users', 10)
+        # The events stay pending until they're written
+        pipeline.delete.assert_not_called()
+        pipeline.hdel.assert_not_called()
+
+    def test_remove(self, mock_redis: Mock):
+        time = datetime(2021, 8, 15, tzinfo=timezone.utc)
+        pipeline = mock_redis().pipeline().__enter__()
+
+        seen.remove({1: {3: time, 4: time}})
+        pipeline.hdel.assert_called_once_with('scraper:seen:1', 3, 4)
+        pipeline.execute.assert_called_once()
+
+    def test_restore(self, mock_redis: Mock):
+        seen.restore({1: {3: datetime(2021, 8, 15, tzinfo=timezone.utc)}})
+        mock_redis().sadd.assert_called_once_with('scraper:seen-users', 1)
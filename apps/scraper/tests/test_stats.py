@@ -0,0 +1,39 @@
+from unittest import mock
+from unittest.mock import Mock
+
+import redis
+from django.test import TestCase
+
+from apps.scraper import stats
+
+
+@mock.patch('apps.scraper.stats._redis')
+class StatsTestCase(TestCase):
+
+    def test_increment(self, mock_redis: Mock):
+        mock_redis().incrby.return_value = 3
+        self.assertEqual(stats.increment(stats.FEED_UPDATES_PROCESSED, 2), 3)
+        mock_redis().incrby.assert_called_once_with('scraper:stats:feed_updates:processed', 2)
+
+    def test_increment_failure(self, mock_redis: Mock):
+        mock_redis().incrby.side_effect = redis.ConnectionError()
+        with self.assertLogs('apps.scraper.stats', 'WARNING'):
+            self.assertIsNone(stats.increment(stats.FEED_UPDATES_PROCESSED))
+
+    def test_get(self, mock_redis: Mock):
+        mock_redis().get.return_value = b'12'
+        self.assertEqual(stats.get(stats.FEED_CACHE_HITS), 12)
+        mock_redis().get.assert_called_once_with('scraper:stats:feed_cache:hits')
+
+    def test_get_missing(self, mock_redis: Mock):
+        mock_redis().get.return_value = None
+        self.assertEqual(stats.get(stats.FEED_CACHE_HITS), 0)
+
+    def test_get_failure(self, mock_redis: Mock):
+        mock_redis().get.side_effect = redis.ConnectionError()
+        with self.assertLogs('apps.scraper.stats', 'WARNING'):
+            self.assertEqual(stats.get(stats.FEED_CACHE_HITS), 0)
+
+    def test_reset(self, mock_redis: Mock):
+        stats.reset(stats.FEED_CACHE_HITS)
+        mock_redis().delete.assert_called_once_with('scraper:stats:feed_cache:hits')
@@ -1,10 +1,13 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
+from unittest.mock import Mock
 
 from django.test import TestCase
+from django.utils.timezone import now
 
 from apps.authentication.models import User
 from apps.authentication.tests import SAMPLE_USER
-from apps.scraper.models import Feed, Subscription
+from apps.scraper.models import Feed, Subscription, Item, Interaction
 from apps.scraper.tests import SAMPLE_FEED
 
 
@@ -29,3 +32,75 @@ class SubscriptionModelTestCase(TestCase):
 
         allowed_subscriptions = Subscription.objects.for_user(user).all()
         self.assertListEqual(list(allowed_subscriptions), [allowed_subscription])
+
+    @mock.patch('apps.scraper.unread.invalidate')
+    def test_subscription_changes_invalidate_unread_counter(self, mock_invalidate: Mock):
+        user = User.objects.create_user(**SAMPLE_USER)
+        feed = Feed.objects.create(url='https://test.com', **SAMPLE_FEED)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            subscription = Subscription.objects.create(
+                user=user,
+                feed=feed,
+            )
+        mock_invalidate.assert_called_once_with([user.pk])
+
+        mock_invalidate.reset_mock()
+        with self.captureOnCommitCallbacks(execute=True):
+            subscription.delete()
+        mock_invalidate.assert_called_once_with([user.pk])
+
+    @mock.patch('apps.scraper.unread.invalidate')
+    def test_mark_read(self, mock_invalidate: Mock):
+        user = User.objects.create_user(**SAMPLE_USER)
+        feed = Feed.objects.create(url='https://test.com', **SAMPLE_FEED)
+        feed.users.add(user)
+        subscription = Subscription.objects.get(user=user, feed=feed)
+        watermark = now()
+        yesterday, tomorrow = watermark - timedelta(days=1), watermark + timedelta(days=1)
+        old_item = Item.objects.create(feed=feed, link='https://test.com/1', pubDate=yesterday)
+        undated_item = Item.objects.create(feed=feed, link='https://test.com/2')
+        new_item = Item.objects.create(feed=feed, link='https://test.com/3', pubDate=tomorrow)
+        bookmarked_item = Item.objects.create(feed=feed, link='https://test.com/4', pubDate=yesterday)
+        Interaction.objects.create(user=user, item=old_item)
+        Interaction.objects.create(user=user, item=bookmarked_item, date_bookmarked=now())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertNumQueries(2):
+                Subscription.objects.for_user(user).mark_read(watermark + timedelta(seconds=1))
+        mock_invalidate.assert_called_once_with([user.pk])
+
+        subscription.refresh_from_db()
+        self.assertEqual(subscription.read_until, watermark + timedelta(seconds=1))
+        self.assertListEqual(list(Item.objects.unread(user)), [new_item])
+        self.assertEqual(Item.objects.unread_item_count(user), 1)
+        items = {item.pk: item for item in Item.objects.for_user(user)}
+        self.assertTrue(items[undated_item.pk].is_seen)
+        self.assertFalse(items[new_item.pk].is_seen)
+        # The existing interactions are kept, and no new ones are written
+        self.assertSetEqual(set(Interaction.objects.values_list('item', flat=True)), {old_item.pk, bookmarked_item.pk})
+
+    def test_mark_read_keeps_seen_items_across_resubscribing(self):
+        user = User.objects.create_user(**SAMPLE_USER)
+        feed = Feed.objects.create(url='https://test.com', **SAMPLE_FEED)
+        subscription = Subscription.objects.create(user=user, feed=feed)
+        seen_item = Item.objects.create(feed=feed, link='https://test.com/1', pubDate=now() - timedelta(days=1))
+        date_seen = Interaction.objects.create(user=user, item=seen_item).date_seen
+
+        Subscription.objects.for_user(user).mark_read(now())
+        subscription.delete()
+        Subscription.objects.create(user=user, feed=feed)
+
+        self.assertTrue(Item.objects.for_user(user).get().is_seen)
+        self.assertListEqual(list(Item.objects.unread(user)), [])
+        self.assertEqual(Interaction.objects.get(user=user, item=seen_item).date_seen, date_seen)
+
+    def test_mark_read_never_moves_back(self):
+        user = User.objects.create_user(**SAMPLE_USER)
+        feed = Feed.objects.create(url='https://test.com', **SAMPLE_FEED)
+        watermark = now()
+        subscription = Subscription.objects.create(user=user, feed=feed, read_until=watermark)
+
+        Subscription.objects.for_user(user).mark_read(watermark - timedelta(days=1))
+        subscription.refresh_from_db()
+        self.assertEqual(subscription.read_until, watermark)
@@ -0,0 +1,81 @@
+from datetime import timedelta
+from unittest import mock
+from unittest.mock import Mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils.timezone import now
+
+from apps.authentication.models import User
+from apps.authentication.tests import SAMPLE_USER
+from apps.scraper.models import Feed, Item, Subscription, TimelineEntry
+from apps.scraper.tests import SAMPLE_FEED, SAMPLE_ITEMS
+
+
+@override_settings(DIGICLOUD_TIMELINE_FAN_OUT='write')
+class TimelineEntryModelTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(**SAMPLE_USER)
+        self.feed = Feed.objects.create(url='https://test.com', **SAMPLE_FEED)
+
+    def test_subscribing_backfills_timeline(self):
+        item = Item.objects.create(feed=self.feed, link='https://test.com/1', pubDate=now())
+        Subscription.objects.create(user=self.user, feed=self.feed)
+
+        entry = TimelineEntry.objects.get()
+        self.assertEqual(entry.user, self.user)
+        self.assertEqual(entry.item, item)
+        self.assertEqual(entry.feed, self.feed)
+        self.assertEqual(entry.pubDate, item.pubDate)
+
+    def test_unsubscribing_clears_timeline(self):
+        other_feed = Feed.objects.create(url='https://test2.com', **SAMPLE_FEED)
+        Item.objects.create(feed=self.feed, link='https://test.com/1')
+        Item.objects.create(feed=other_feed, link='https://test2.com/1')
+        subscription = Subscription.objects.create(user=self.user, feed=self.feed)
+        Subscription.objects.create(user=self.user, feed=other_feed)
+
+        subscription.delete()
+
+        self.assertListEqual(list(TimelineEntry.objects.values_list('feed', flat=True)), [other_feed.pk])
+
+    @mock.patch('apps.scraper.rss.fetch_url')
+    @mock.patch('apps.scraper.rss.parse_response')
+    def test_update_items_fans_out(self, mock_parse_response: Mock, mock_fetch_url: Mock):
+        mock_parse_response.return_value = (SAMPLE_FEED.copy(), SAMPLE_ITEMS.copy())
+        mock_fetch_url.return_value.status_code = 200
+        mock_fetch_url.return_value.moved_to = None
+        mock_fetch_url.return_value.headers = {}
+        mock_fetch_url.return_value.digest = 'digest'
+        Item.objects.create(feed=self.feed, link='https://test.com/old')
+        Subscription.objects.create(user=self.user, feed=self.feed)
+
+        self.feed.update_items()
+
+        self.assertEqual(TimelineEntry.objects.filter(user=self.user).count(), len(SAMPLE_ITEMS) + 1)
+
+    def test_timeline_order(self):
+        date = now()
+        items = [
+            Item.objects.create(feed=self.feed, link='https://test.com/1', pubDate=date - timedelta(days=1)),
+            Item.objects.create(feed=self.feed, link='https://test.com/2', pubDate=date),
+        ]
+        Subscription.objects.create(user=self.user, feed=self.feed)
+        other_user_data = SAMPLE_USER.copy()
+        other_user_data['username'] = 'another'
+        other_user_data['email'] = 'another@john.com'
+        Subscription.objects.create(user=User.objects.create_user(**other_user_data), feed=self.feed)
+
+        timeline = Item.objects.timeline(self.user).order_by('-timeline_date', '-id')
+        self.assertListEqual(list(timeline), [items[1], items[0]])
+        self.assertEqual(timeline[0].timeline_date, items[1].pubDate)
+
+    def test_rebuild_timelines(self):
+        Item.objects.create(feed=self.feed, link='https://test.com/1')
+        with override_settings(DIGICLOUD_TIMELINE_FAN_OUT='read'):
+            Subscription.objects.create(user=self.user, feed=self.feed)
+        self.assertFalse(TimelineEntry.objects.exists())
+
+        call_command('rebuild_timelines', stdout=Mock())
+
+        self.assertEqual(TimelineEntry.objects.filter(user=self.user).count(), 1)
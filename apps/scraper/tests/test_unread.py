@@ -0,0 +1,54 @@
+from datetime import timedelta
+from unittest import mock
+from unittest.mock import Mock
+
+import redis
+from django.test import TestCase, override_settings
+
+from apps.scraper import unread
+
+
+@override_settings(DIGICLOUD_CACHE_UNREAD_COUNTS=True, DIGICLOUD_UNREAD_COUNTER_TTL=timedelta(hours=1))
+@mock.patch('apps.scraper.unread._redis')
+class UnreadCounterTestCase(TestCase):
+
+    def test_get_existing(self, mock_redis: Mock):
+        mock_redis().get.return_value = b'12'
+        self.assertEqual(unread.get(1), 12)
+        mock_redis().get.assert_called_once_with('scraper:unread:1')
+
+    def test_get_missing(self, mock_redis: Mock):
+        mock_redis().get.return_value = None
+        self.assertIsNone(unread.get(1))
+
+    def test_get_failure(self, mock_redis: Mock):
+        mock_redis().get.side_effect = redis.ConnectionError()
+        with self.assertLogs('apps.scraper.unread', 'WARNING'):
+            self.assertIsNone(unread.get(1))
+
+    @override_settings(DIGICLOUD_CACHE_UNREAD_COUNTS=False)
+    def test_get_disabled(self, mock_redis: Mock):
+        self.assertIsNone(unread.get(1))
+        mock_redis().get.assert_not_called()
+
+    def test_store_keeps_existing_counter(self, mock_redis: Mock):
+        unread.store(1, 5)
+        mock_redis().set.assert_called_once_with('scraper:unread:1', 5, ex=timedelta(hours=1), nx=True)
+
+    def test_store_overwrite(self, mock_redis: Mock):
+        unread.store(1, 5, overwrite=True)
+        mock_redis().set.assert_called_once_with('scraper:unread:1', 5, ex=timedelta(hours=1), nx=False)
+
+    def test_increment(self, mock_redis: Mock):
+        unread.increment([1, 2], 3)
+        mock_redis().eval.assert_called_once_with(mock.ANY, 2, 'scraper:unread:1', 'scraper:unread:2', 3)
+
+    def test_increment_failure_invalidates(self, mock_redis: Mock):
+        mock_redis().eval.side_effect = redis.ConnectionError()
+        with self.assertLogs('apps.scraper.unread', 'WARNING'):
+            unread.increment([1], -1)
+        mock_redis().delete.assert_called_once_with('scraper:unread:1')
+
+    def test_invalidate(self, mock_redis: Mock):
+        unread.invalidate([1, 2])
+        mock_redis().delete.assert_called_once_with('scraper:unread:1', 'scraper:unread:2')
@@ -3,11 +3,13 @@ from unittest import mock
 from unittest.mock import Mock
 
 from django.conf import settings
+from django.db import DatabaseError
 from django.test import TestCase, override_settings
+from django.utils.timezone import now
 from requests import RequestException
 
-from apps.scraper.models import Feed
-from apps.scraper.tasks import _update_feed, update_feed
+from apps.scraper.models import Feed, FEED_STATUS_PENDING, FEED_STATUS_ACTIVE, FEED_STATUS_FAILED
+from apps.scraper.tasks import _update_feed, update_feed, update_feeds, sweep_feeds, initialize_feed, flush_seen_events
 from apps.scraper.tests import SAMPLE_FEED
 
 
@@ -22,6 +24,102 @@ class UpdateFeedTaskTestCase(TestCase):
         update_feed(feed.pk)
         mock_update_feed.assert_called_once_with(feed)
 
+    @mock.patch('apps.scraper.tasks._update_feed')
+    def test_update_task_skips_early_runs(self, mock_update_feed: Mock):
+        feed = Feed.objects.create(
+            url='https://test.com',
+            not_before=now() + timedelta(minutes=10),
+            **SAMPLE_FEED,
+        )
+        update_feed(feed.pk)
+        mock_update_feed.assert_not_called()
+
+    def test_backoff_with_retry_after(self):
+        feed = Mock()
+        feed.interval = timedelta(seconds=10)
+        error = RequestException(response=Mock(status_code=429, headers={'Retry-After': '3600'}))
+
+        _update_feed(feed, error)
+
+        retry_time, = feed.defer.call_args.args
+        self.assertGreater(retry_time, now() + timedelta(minutes=59))
+
+    def test_backoff_keeps_earlier_hints(self):
+        feed = Mock()
+        feed.interval = timedelta(seconds=10)
+        error = RequestException(response=Mock(status_code=500, headers={}))
+
+        _update_feed(feed, error)
+
+        feed.defer.assert_not_called()
+
+    @mock.patch('apps.scraper.tasks._update_feed')
+    @mock.patch('apps.scraper.fetch.fetch_feeds')
+    def test_correct_batch_update_task(self, mock_fetch_feeds: Mock, mock_update_feed: Mock):
+        feeds = [
+            Feed.objects.create(url='https://test.com', **SAMPLE_FEED),
+            Feed.objects.create(url='https://test2.com', **SAMPLE_FEED),
+        ]
+        responses = [Mock(), Mock()]
+        mock_fetch_feeds.side_effect = lambda queryset: list(zip(queryset, responses))
+        mock_update_feed.side_effect = [ValueError(), None]
+
+        with self.assertLogs('apps.scraper.tasks', 'ERROR'):
+            update_feeds([feed.pk for feed in feeds])
+
+        mock_update_feed.assert_has_calls([
+            mock.call(feeds[0], responses[0]),
+            mock.call(feeds[1], responses[1]),
+        ])
+
+    @override_settings(DIGICLOUD_SWEEP_BATCH_SIZE=2)
+    @mock.patch('apps.scraper.tasks.update_feeds.delay')
+    def test_sweep_dispatches_due_feeds_in_batches(self, mock_delay: Mock):
+        due_feeds = [
+            Feed.objects.create(url=f'https://test.com/{i}', next_update_at=now() - timedelta(minutes=i), **SAMPLE_FEED)
+            for i in range(3)
+        ]
+        Feed.objects.create(url='https://test2.com', next_update_at=now() + timedelta(minutes=1), **SAMPLE_FEED)
+
+        sweep_feeds()
+
+        mock_delay.assert_has_calls([
+            mock.call([due_feeds[2].pk, due_feeds[1].pk]),
+            mock.call([due_feeds[0].pk]),
+        ])
+        self.assertFalse(Feed.objects.due_for_update().exists())
+
+    def test_update_execution_schedules_next_update(self):
+        feed = Mock()
+        feed.expected_ttl = timedelta(seconds=5)
+        feed.interval = timedelta(seconds=5)
+
+        _update_feed(feed)
+
+        feed.schedule_next_update.assert_called_once()
+
+    def test_update_execution_with_fetched_response(self):
+        feed = Mock()
+        feed.expected_ttl = timedelta(seconds=5)
+        feed.interval = timedelta(seconds=5)
+        response = Mock()
+
+        _update_feed(feed, response)
+
+        feed.update_items.assert_called_once_with(response)
+
+    @override_settings(DIGICLOUD_BACKOFF_MAXIMUM_DURATION=timedelta(seconds=60))
+    @override_settings(DIGICLOUD_BACKOFF_FACTOR=2)
+    def test_backoff_with_fetch_error(self):
+        feed = Mock()
+        interval = timedelta(seconds=10)
+        feed.interval = interval
+
+        _update_feed(feed, RequestException())
+
+        feed.update_items.assert_not_called()
+        self.assertEqual(feed.interval, interval * settings.DIGICLOUD_BACKOFF_FACTOR)
+
     def test_correct_update_execution(self):
         feed = Mock()
         feed.expected_ttl = timedelta(seconds=5)
@@ -41,6 +139,16 @@ class UpdateFeedTaskTestCase(TestCase):
 
         self.assertEqual(feed.interval, expected)
 
+    @override_settings(DIGICLOUD_UPDATE_INTERVAL_MODE='adaptive')
+    def test_adaptive_interval(self):
+        feed = Mock()
+        feed.adaptive_interval = timedelta(hours=2)
+        feed.interval = timedelta(minutes=5)
+
+        _update_feed(feed)
+
+        self.assertEqual(feed.interval, timedelta(hours=2))
+
     @override_settings(DIGICLOUD_BACKOFF_MAXIMUM_DURATION=timedelta(seconds=60))
     @override_settings(DIGICLOUD_BACKOFF_FACTOR=2)
     def test_normal_backoff(self):
@@ -62,3 +170,59 @@ class UpdateFeedTaskTestCase(TestCase):
 
         _update_feed(feed)
         self.assertEqual(feed.interval, settings.DIGICLOUD_BACKOFF_MAXIMUM_DURATION)
+
+    @mock.patch('apps.scraper.models.Feed.initialize')
+    def test_initialize_feed(self, mock_initialize: Mock):
+        pending_feed = Feed.objects.create(url='https://test.com', status=FEED_STATUS_PENDING, **SAMPLE_FEED)
+        active_feed = Feed.objects.create(url='https://test2.com', status=FEED_STATUS_ACTIVE, **SAMPLE_FEED)
+
+        initialize_feed(pending_feed.pk)
+        initialize_feed(active_feed.pk)
+
+        mock_initialize.assert_called_once_with()
+
+    @mock.patch('apps.scraper.models.Feed.initialize')
+    def test_initialize_feed_failure(self, mock_initialize: Mock):
+        feed = Feed.objects.create(url='https://test.com', status=FEED_STATUS_PENDING, **SAMPLE_FEED)
+        mock_initialize.side_effect = RequestException()
+
+        with self.assertLogs('apps.scraper.tasks', 'ERROR'):
+            initialize_feed(feed.pk)
+
+        feed.refresh_from_db()
+        self.assertEqual(feed.status, FEED_STATUS_FAILED)
+        self.assertEqual(feed.version, 1)
+
+    @override_settings(DIGICLOUD_BUFFER_SEEN_EVENTS=True)
+    @mock.patch('apps.scraper.seen.remove')
+    @mock.patch('apps.scraper.models.Interaction.objects.insert_seen')
+    @mock.patch('apps.scraper.seen.drain')
+    def test_flush_seen_events(self, mock_drain: Mock, mock_insert_seen: Mock, mock_remove: Mock):
+        time = now()
+        mock_drain.side_effect = [{1: {2: time, 3: time}}, {4: {5: time}}, {}]
+
+        flush_seen_events()
+        self.assertListEqual(mock_insert_seen.call_args_list, [
+            mock.call([(1, 2, time), (1, 3, time)]),
+            mock.call([(4, 5, time)]),
+        ])
+        self.assertListEqual(mock_remove.call_args_list, [
+            mock.call({1: {2: time, 3: time}}),
+            mock.call({4: {5: time}}),
+        ])
+
+    @override_settings(DIGICLOUD_BUFFER_SEEN_EVENTS=True)
+    @mock.patch('apps.scraper.seen.remove')
+    @mock.patch('apps.scraper.seen.restore')
+    @mock.patch('apps.scraper.models.Interaction.objects.insert_seen')
+    @mock.patch('apps.scraper.seen.drain')
+    def test_flush_seen_events_failure(self, mock_drain: Mock, mock_insert_seen: Mock, mock_restore: Mock,
+                                       mock_remove: Mock):
+        events = {1: {2: now()}}
+        mock_drain.return_value = events
+        mock_insert_seen.side_effect = DatabaseError()
+
+        with self.assertRaises(DatabaseError):
+            flush_seen_events()
+        mock_restore.assert_called_once_with(events)
+        mock_remove.assert_not_called()
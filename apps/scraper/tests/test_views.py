@@ -1,11 +1,16 @@
+from datetime import datetime, timezone
 from unittest import mock
 from unittest.mock import Mock
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.utils.timezone import now
+from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.serializers import Serializer
 
+from apps.scraper.models import FEED_STATUS_PENDING, FEED_STATUS_ACTIVE
+from apps.scraper.pagination import KeysetPagination, TimelineKeysetPagination
 from apps.scraper.serializers import SubscriptionSerializer, SubscriptionCreationSerializer, FeedSerializer, \
-    CommentSerializer, ItemSerializer
+    CommentSerializer, ItemSerializer, MarkReadSerializer, BulkInteractionSerializer
 from apps.scraper.views import SubscriptionViewSet, FeedViewSet, ItemViewSet
 
 
@@ -21,6 +26,47 @@ class ViewsTestCase(TestCase):
         viewset.action = 'create'
         self.assertEqual(viewset.get_serializer_class(), SubscriptionCreationSerializer)
 
+    def test_subscription_mark_read_using_correct_serializer(self):
+        viewset = SubscriptionViewSet()
+        for action in ('mark_read', 'mark_all_read'):
+            viewset.action = action
+            self.assertEqual(viewset.get_serializer_class(), MarkReadSerializer)
+
+    @mock.patch('apps.scraper.views.SubscriptionViewSet.get_object')
+    @mock.patch('apps.scraper.models.Subscription.objects.for_user')
+    def test_subscription_mark_read(self, mock_for_user: Mock, mock_get_object: Mock):
+        viewset = SubscriptionViewSet()
+        viewset.request = Mock()
+        viewset.request.data = {'until': '2021-08-15T00:00:00Z'}
+        viewset.format_kwarg = None
+        viewset.action = 'mark_read'
+
+        response = viewset.mark_read(viewset.request)
+        self.assertEqual(response.status_code, 204)
+        mock_for_user().filter.assert_called_once_with(feed=mock_get_object().feed_id)
+        mock_for_user().filter().mark_read.assert_called_once()
+
+    def test_subscription_mark_read_clamps_future_watermarks(self):
+        serializer = MarkReadSerializer(data={'until': '2036-01-01T00:00:00Z'})
+        self.assertTrue(serializer.is_valid())
+        self.assertLessEqual(serializer.validated_data['until'], now())
+
+        serializer = MarkReadSerializer(data={'until': '2021-08-15T00:00:00Z'})
+        self.assertTrue(serializer.is_valid())
+        self.assertEqual(serializer.validated_data['until'], datetime(2021, 8, 15, tzinfo=timezone.utc))
+
+    @mock.patch('apps.scraper.models.Subscription.objects.for_user')
+    def test_subscription_mark_all_read(self, mock_for_user: Mock):
+        viewset = SubscriptionViewSet()
+        viewset.request = Mock()
+        viewset.request.data = {}
+        viewset.format_kwarg = None
+        viewset.action = 'mark_all_read'
+
+        response = viewset.mark_all_read(viewset.request)
+        self.assertEqual(response.status_code, 204)
+        mock_for_user().mark_read.assert_called_once()
+
     @mock.patch('apps.scraper.models.Subscription.objects.for_user')
     def test_subscription_viewset_using_correct_queryset(self, mock_for_user: Mock):
         viewset = SubscriptionViewSet()
@@ -29,6 +75,38 @@ class ViewsTestCase(TestCase):
         viewset.get_queryset()
         mock_for_user.assert_called_once()
 
+    @mock.patch('apps.scraper.views.SubscriptionViewSet.get_serializer')
+    def test_subscription_create_accepts_pending_feeds(self, mock_get_serializer: Mock):
+        viewset = SubscriptionViewSet()
+        viewset.request = Mock()
+        viewset.format_kwarg = None
+        mock_get_serializer().data = {}
+
+        mock_get_serializer().instance.feed.status = FEED_STATUS_PENDING
+        self.assertEqual(viewset.create(viewset.request).status_code, 202)
+
+        mock_get_serializer().instance.feed.status = FEED_STATUS_ACTIVE
+        self.assertEqual(viewset.create(viewset.request).status_code, 201)
+
+    @override_settings(DIGICLOUD_ASYNC_SUBSCRIPTIONS=True)
+    @mock.patch('apps.scraper.tasks.initialize_feed.delay')
+    @mock.patch('apps.scraper.models.Feed.objects.get_or_create_from_url')
+    def test_subscription_creation_fetches_in_background(self, mock_get_or_create_from_url: Mock, mock_delay: Mock):
+        serializer = SubscriptionCreationSerializer(context={'request': Mock()})
+        mock_get_or_create_from_url.return_value.status = FEED_STATUS_PENDING
+
+        with mock.patch('apps.scraper.models.Subscription.objects.create'), \
+                self.captureOnCommitCallbacks(execute=True):
+            serializer.create({'feed_url': 'https://test.com'})
+
+        mock_get_or_create_from_url.assert_called_once_with('https://test.com', fetch=False)
+        mock_delay.assert_called_once_with(mock_get_or_create_from_url.return_value.pk)
+
+    def test_subscription_creation_rejects_invalid_ports(self):
+        serializer = SubscriptionCreationSerializer(data={'feed_url': 'http://test.com:99999/feed'})
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('feed_url', serializer.errors)
+
     def test_feed_viewset_using_correct_serializer(self):
         self.assertEqual(FeedViewSet().get_serializer_class(), FeedSerializer)
 
@@ -60,6 +138,21 @@ class ViewsTestCase(TestCase):
         viewset.action = 'list'
         self.assertEqual(viewset.get_serializer_class(), ItemSerializer)
 
+    def test_item_list_using_keyset_pagination_with_cursor(self):
+        viewset = ItemViewSet()
+        viewset.request = Mock()
+        viewset.request.query_params = {'cursor': ''}
+        for action in ('list', 'bookmarks'):
+            viewset.action = action
+            self.assertEqual(viewset.get_pagination_class(), KeysetPagination)
+
+    def test_item_list_using_default_pagination(self):
+        viewset = ItemViewSet()
+        viewset.request = Mock()
+        viewset.request.query_params = {}
+        viewset.action = 'list'
+        self.assertEqual(viewset.get_pagination_class(), LimitOffsetPagination)
+
     @mock.patch('apps.scraper.models.Item.objects')
     def test_item_viewset_using_correct_queryset(self, mock_objects: Mock):
         viewset = ItemViewSet()
@@ -73,6 +166,21 @@ class ViewsTestCase(TestCase):
         mock_objects.for_user.assert_called_once()
         mock_objects.order_by.assert_called_once_with('-pubDate')
 
+    @override_settings(DIGICLOUD_TIMELINE_FAN_OUT='write')
+    @mock.patch('apps.scraper.models.Item.objects')
+    def test_item_viewset_using_timeline(self, mock_objects: Mock):
+        viewset = ItemViewSet()
+        viewset.request = Mock()
+        viewset.request.query_params = {'cursor': ''}
+        viewset.action = 'list'
+
+        mock_objects.timeline.return_value = mock_objects
+
+        viewset.get_queryset()
+        mock_objects.timeline.assert_called_once()
+        mock_objects.order_by.assert_called_once_with('-timeline_date', '-id')
+        self.assertEqual(viewset.get_pagination_class(), TimelineKeysetPagination)
+
     @mock.patch('apps.scraper.models.Item.objects')
     def test_item_bookmarks_using_correct_queryset(self, mock_objects: Mock):
         viewset = ItemViewSet()
@@ -108,23 +216,53 @@ class ViewsTestCase(TestCase):
         viewset.get_object()
         mock_get_object().interact_with_user.assert_not_called()
 
-    @mock.patch('apps.scraper.views.mixins.RetrieveModelMixin.retrieve')
+    @mock.patch('apps.scraper.views.ItemViewSet.get_serializer')
     @mock.patch('apps.scraper.views.ItemViewSet.get_object')
-    def test_item_retrieve_interacts_with_user(self, mock_get_object: Mock, mock_retrieve: Mock):
+    def test_item_retrieve_marks_seen(self, mock_get_object: Mock, mock_get_serializer: Mock):
         viewset = ItemViewSet()
         viewset.request = Mock()
         viewset.retrieve(viewset.request)
 
-        mock_get_object().interact_with_user.assert_called_once()
-        mock_retrieve.assert_called_once()
+        mock_get_object.assert_called_once()
+        mock_get_object().mark_seen.assert_called_once_with(viewset.request.user)
+        mock_get_object().interact_with_user.assert_not_called()
+        mock_get_serializer.assert_called_once_with(mock_get_object())
+
+    @mock.patch('apps.scraper.models.Interaction.objects.bulk_interact')
+    def test_item_bulk_interactions(self, mock_bulk_interact: Mock):
+        viewset = ItemViewSet()
+        viewset.request = Mock()
+        viewset.request.data = {'seen': [1, 2, 1], 'bookmark': [1], 'unbookmark': [3]}
+        viewset.format_kwarg = None
+        viewset.action = 'interactions'
+        mock_bulk_interact.return_value = {1, 2}, {'seen': {1}, 'bookmark': {1}, 'unbookmark': set()}
+
+        response = viewset.interactions(viewset.request)
+        mock_bulk_interact.assert_called_once_with(viewset.request.user, seen=[1, 2, 1], bookmark=[1], unbookmark=[3])
+        self.assertListEqual(response.data['results'], [
+            {'id': 1, 'action': 'seen', 'status': 'applied'},
+            {'id': 2, 'action': 'seen', 'status': 'unchanged'},
+            {'id': 1, 'action': 'bookmark', 'status': 'applied'},
+            {'id': 3, 'action': 'unbookmark', 'status': 'not_found'},
+        ])
+
+    def test_item_bulk_interactions_validation(self):
+        viewset = ItemViewSet()
+        viewset.action = 'interactions'
+        serializer_class = viewset.get_serializer_class()
+        self.assertEqual(serializer_class, BulkInteractionSerializer)
+
+        self.assertFalse(serializer_class(data={'bookmark': [1], 'unbookmark': [1]}).is_valid())
+        self.assertFalse(serializer_class(data={'seen': list(range(serializer_class.max_items + 1))}).is_valid())
+        self.assertTrue(serializer_class(data={'seen': [1], 'bookmark': [1]}).is_valid())
 
-    @mock.patch('apps.scraper.models.Item.objects.unread_item_count')
-    def test_item_unread_count_reads_correctly(self, mock_unread_item_count: Mock):
+    @mock.patch('apps.scraper.models.Item.objects.cached_unread_item_count')
+    def test_item_unread_count_reads_correctly(self, mock_cached_unread_item_count: Mock):
         viewset = ItemViewSet()
         viewset.request = Mock()
         viewset.unread_count(viewset.request)
 
-        mock_unread_item_count.assert_called_once()
+        mock_cached_unread_item_count.assert_called_once()
 
     @mock.patch('apps.scraper.views.ItemViewSet.get_object')
     def test_item_add_bookmark_works(self, mock_get_object: Mock):
@@ -0,0 +1,77 @@
+"""
+Per-user unread item counters, kept in Redis and updated incrementally as items and interactions get created.
+
+A counter that doesn't exist simply means "unknown": it gets computed from the database the next time it's read, and
+increments never create it. This keeps the counters self-healing, since a counter that got evicted, expired or
+invalidated is rebuilt from the source of truth instead of drifting from it.
+"""
+import logging
+
+import redis
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_KEY_PREFIX = 'scraper:unread:'
+
+_INCREMENT_EXISTING_SCRIPT = """
+for _, key in ipairs(KEYS) do
+    if redis.call('EXISTS', key) == 1 then
+        redis.call('INCRBY', key, ARGV[1])
+    end
+end
+"""
+
+_client = None
+
+
+def _redis() -> redis.Redis:
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(settings.DIGICLOUD_REDIS_URL)
+    return _client
+
+
+def _key(user_pk):
+    return f'{_KEY_PREFIX}{user_pk}'
+
+
+def get(user_pk):
+    if not settings.DIGICLOUD_CACHE_UNREAD_COUNTS:
+        return None
+    try:
+        count = _redis().get(_key(user_pk))
+    except redis.RedisError:
+        logger.warning('Reading the unread counter of user #%s failed', user_pk, exc_info=True)
+        return None
+    return int(count) if count is not None else None
+
+
+def store(user_pk, count, overwrite=False):
+    if not settings.DIGICLOUD_CACHE_UNREAD_COUNTS:
+        return
+    try:
+        # Unless asked otherwise, don't overwrite a counter that was created (and maybe updated) in the meantime
+        _redis().set(_key(user_pk), count, ex=settings.DIGICLOUD_UNREAD_COUNTER_TTL, nx=not overwrite)
+    except redis.RedisError:
+        logger.warning('Storing the unread counter of user #%s failed', user_pk, exc_info=True)
+
+
+def increment(user_pks, delta):
+    if not settings.DIGICLOUD_CACHE_UNREAD_COUNTS or not user_pks:
+        return
+    keys = [_key(user_pk) for user_pk in user_pks]
+    try:
+        _redis().eval(_INCREMENT_EXISTING_SCRIPT, len(keys), *keys, delta)
+    except redis.RedisError:
+        logger.warning('Updating the unread counters failed, invalidating them instead', exc_info=True)
+        invalidate(user_pks)
+
+
+def invalidate(user_pks):
+    if not settings.DIGICLOUD_CACHE_UNREAD_COUNTS or not user_pks:
+        return
+    try:
+        _redis().delete(*(_key(user_pk) for user_pk in user_pks))
+    except redis.RedisError:
+        logger.warning('Invalidating the unread counters failed', exc_info=True)
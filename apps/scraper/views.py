@@ -1,12 +1,18 @@
+from django.conf import settings
+from django.utils.timezone import now
 from rest_framework import viewsets, mixins, status
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.serializers import Serializer
+from rest_framework.settings import api_settings
 
-from apps.scraper.models import Subscription, Feed, Item
+from apps.scraper import feed_cache
+from apps.scraper.filters import ItemFilterBackend
+from apps.scraper.models import Subscription, Feed, Item, Interaction, FAN_OUT_ON_WRITE, FEED_STATUS_ACTIVE
+from apps.scraper.pagination import KeysetPagination, TimelineKeysetPagination
 from apps.scraper.serializers import SubscriptionSerializer, SubscriptionCreationSerializer, FeedSerializer, \
-    ItemSerializer, CommentSerializer
+    ItemSerializer, CommentSerializer, MarkReadSerializer, BulkInteractionSerializer
 
 
 class SubscriptionViewSet(mixins.CreateModelMixin,
@@ -23,8 +29,38 @@ class SubscriptionViewSet(mixins.CreateModelMixin,
     def get_serializer_class(self):
         if self.action == 'create':
             return SubscriptionCreationSerializer
+        if self.action in ('mark_read', 'mark_all_read'):
+            return MarkReadSerializer
         return SubscriptionSerializer
 
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        self.perform_create(serializer)
+        headers = self.get_success_headers(serializer.data)
+        # The feed is still being fetched in the background, and its status tells when it's done
+        pending = serializer.instance.feed.status != FEED_STATUS_ACTIVE
+        return Response(
+            serializer.data,
+            status=status.HTTP_202_ACCEPTED if pending else status.HTTP_201_CREATED,
+            headers=headers,
+        )
+
+    @action(detail=True, methods=['post'])
+    def mark_read(self, request, *args, **kwargs):
+        subscription = self.get_object()
+        return self._mark_read(request, self.get_queryset().filter(feed=subscription.feed_id))
+
+    @action(detail=False, methods=['post'])
+    def mark_all_read(self, request, *args, **kwargs):
+        return self._mark_read(request, self.get_queryset())
+
+    def _mark_read(self, request, subscriptions):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        subscriptions.mark_read(serializer.validated_data.get('until', now()))
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
 
 class FeedViewSet(mixins.RetrieveModelMixin,
                   viewsets.GenericViewSet):
@@ -34,11 +70,20 @@ class FeedViewSet(mixins.RetrieveModelMixin,
     def get_queryset(self):
         return Feed.objects.for_user(self.request.user)
 
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        serializer = self.get_serializer(instance)
+        if 'items' in serializer.fields:
+            # Full representations of large feeds don't fit in the cache
+            return Response(serializer.data)
+        return Response(feed_cache.get_or_set(instance, request, lambda: serializer.data))
+
 
 class ItemViewSet(mixins.RetrieveModelMixin,
                   mixins.ListModelMixin,
                   viewsets.GenericViewSet):
     permission_classes = (IsAuthenticated,)
+    filter_backends = (ItemFilterBackend,)
 
     def get_serializer_class(self):
         if self.action == 'comment':
@@ -46,9 +91,35 @@ class ItemViewSet(mixins.RetrieveModelMixin,
         if self.action in ('bookmark', 'remove_bookmark'):
             # The bookmark requests don't need any data serialization, so we'll just pass on an empty one
             return Serializer
+        if self.action == 'interactions':
+            return BulkInteractionSerializer
         return ItemSerializer
 
+    def uses_timeline(self):
+        return self.action == 'list' and settings.DIGICLOUD_TIMELINE_FAN_OUT == FAN_OUT_ON_WRITE
+
+    def get_date_field(self):
+        # Annotated by `ItemQuerySet.timeline`
+        return 'timeline_date' if self.uses_timeline() else 'pubDate'
+
+    def get_pagination_class(self):
+        # Clients opt into keyset pagination by sending a cursor, which is empty for the first page
+        if self.action in ('list', 'bookmarks') and KeysetPagination.cursor_query_param in self.request.query_params:
+            return TimelineKeysetPagination if self.uses_timeline() else KeysetPagination
+        return api_settings.DEFAULT_PAGINATION_CLASS
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            pagination_class = self.get_pagination_class()
+            self._paginator = pagination_class() if pagination_class is not None else None
+        return self._paginator
+
     def get_queryset(self):
+        if self.uses_timeline():
+            return Item.objects\
+                .timeline(self.request.user)\
+                .order_by('-timeline_date', '-id')
         queryset = Item.objects\
             .order_by('-pubDate')\
             .for_user(self.request.user)
@@ -63,12 +134,15 @@ class ItemViewSet(mixins.RetrieveModelMixin,
         return item
 
     def retrieve(self, request, *args, **kwargs):
-        self.get_object().interact_with_user(request.user)
-        return super().retrieve(request, *args, **kwargs)
+        # The item is fetched once, along with the user's interaction, and marked as seen right after
+        instance = self.get_object()
+        instance.mark_seen(request.user)
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
     def unread_count(self, request, *args, **kwargs):
-        return Response({'unread_count': Item.objects.unread_item_count(request.user)})
+        return Response({'unread_count': Item.objects.cached_unread_item_count(request.user)})
 
     @action(detail=True, methods=['patch'])
     def bookmark(self, request, *args, **kwargs):
@@ -84,6 +158,23 @@ class ItemViewSet(mixins.RetrieveModelMixin,
     def bookmarks(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
+    @action(detail=False, methods=['post'])
+    def interactions(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        found_item_pks, changed = Interaction.objects.bulk_interact(request.user, **serializer.validated_data)
+
+        def get_status(action_name, item_pk):
+            if item_pk not in found_item_pks:
+                return 'not_found'
+            return 'applied' if item_pk in changed[action_name] else 'unchanged'
+
+        return Response({'results': [
+            {'id': item_pk, 'action': action_name, 'status': get_status(action_name, item_pk)}
+            for action_name, item_pks in serializer.validated_data.items()
+            for item_pk in dict.fromkeys(item_pks)
+        ]})
+
     @action(detail=True, methods=['patch'])
     def comment(self, request, *args, **kwargs):
         instance = self.get_object()
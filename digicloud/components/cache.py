@@ -0,0 +1,14 @@
+from .common import *
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+CACHES = {
+    'default': {
+        'BACKEND': env('CACHE_BACKEND', default='django.core.cache.backends.memcached.PyMemcacheCache'),
+        'LOCATION': env('CACHE_LOCATION', default='memcached:11211'),
+        'OPTIONS': {
+            # Behave like a cache miss rather than failing the request when memcached is unreachable
+            'ignore_exc': True,
+        },
+    },
+}
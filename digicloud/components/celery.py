@@ -1,4 +1,17 @@
+from datetime import timedelta
+
 from .common import *
 
 CELERY_BROKER_URL = env('CELERY_BROKER_URL', default='redis://redis:6379/0')
 CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
+
+CELERY_BEAT_SCHEDULE = {
+    'sweep-feeds': {
+        'task': 'apps.scraper.tasks.sweep_feeds',
+        'schedule': timedelta(minutes=1),
+    },
+    'flush-seen-events': {
+        'task': 'apps.scraper.tasks.flush_seen_events',
+        'schedule': timedelta(seconds=10),
+    },
+}
@@ -1,5 +1,58 @@
 from datetime import timedelta
 
+from .common import *
+
 DIGICLOUD_DEFAULT_FEED_UPDATE_INTERVAL = timedelta(minutes=5)
 DIGICLOUD_BACKOFF_FACTOR = 1.5
 DIGICLOUD_BACKOFF_MAXIMUM_DURATION = timedelta(days=1)
+
+# Fetching
+DIGICLOUD_FETCH_TIMEOUT = (5, 30)  # Connect and read timeouts, in seconds
+DIGICLOUD_FETCH_MAXIMUM_DURATION = timedelta(minutes=1)
+DIGICLOUD_FETCH_MAXIMUM_SIZE = 10 * 1024 * 1024
+DIGICLOUD_FETCH_SPOOL_SIZE = 1024 * 1024  # Larger bodies are kept on the disk instead of memory while being parsed
+DIGICLOUD_FETCH_CHUNK_SIZE = 64 * 1024
+DIGICLOUD_FETCH_CONCURRENCY = 32
+DIGICLOUD_FETCH_PER_HOST_CONCURRENCY = 4
+
+# Subscribing
+# When enabled, new feeds are fetched by a celery task and subscribing to them responds with 202 right away
+DIGICLOUD_ASYNC_SUBSCRIPTIONS = env.bool('DIGICLOUD_ASYNC_SUBSCRIPTIONS', default=False)
+
+# Polling
+# "ttl" polls feeds as often as their <ttl> says, or at the default interval, while "adaptive" follows the rate each
+# feed has been publishing at, between the minimum and maximum intervals
+DIGICLOUD_UPDATE_INTERVAL_MODE = env('DIGICLOUD_UPDATE_INTERVAL_MODE', default='ttl')
+DIGICLOUD_ADAPTIVE_MINIMUM_INTERVAL = timedelta(minutes=5)
+DIGICLOUD_ADAPTIVE_MAXIMUM_INTERVAL = timedelta(hours=12)
+DIGICLOUD_ADAPTIVE_SMOOTHING = 0.3  # Weight of the latest gap between items in the moving average
+
+# Scheduling
+# "periodic_task" creates one celery beat entry per feed, while "sweep" lets a single periodic task dispatch batches of
+# the feeds that are due
+DIGICLOUD_FEED_SCHEDULER = env('DIGICLOUD_FEED_SCHEDULER', default='periodic_task')
+DIGICLOUD_SWEEP_BATCH_SIZE = 50
+DIGICLOUD_SWEEP_MAXIMUM_BATCHES = 100
+# How long a dispatched feed is hidden from later sweeps, in case its batch gets lost before rescheduling it
+DIGICLOUD_SWEEP_CLAIM_DURATION = timedelta(minutes=30)
+
+# Unread counters
+DIGICLOUD_REDIS_URL = env('REDIS_URL', default='redis://redis:6379/1')
+DIGICLOUD_CACHE_UNREAD_COUNTS = env.bool('DIGICLOUD_CACHE_UNREAD_COUNTS', default=True)
+# Counters are rebuilt from the database at least this often, which bounds how long any drift can last
+DIGICLOUD_UNREAD_COUNTER_TTL = timedelta(hours=1)
+
+# Seen events
+# When enabled, opening an item buffers its seen event in Redis instead of writing the interaction right away, and the
+# `flush_seen_events` task writes the buffered events in bulk. Reads merge in the events that are still pending.
+DIGICLOUD_BUFFER_SEEN_EVENTS = env.bool('DIGICLOUD_BUFFER_SEEN_EVENTS', default=False)
+DIGICLOUD_SEEN_FLUSH_BATCH_SIZE = 500  # Users whose events are written in a single statement batch
+
+# Timelines
+# "read" builds timelines by joining items with subscriptions on every request, while "write" keeps a per-user timeline
+# table up to date as items arrive. Run the `rebuild_timelines` command after switching to "write".
+DIGICLOUD_TIMELINE_FAN_OUT = env('DIGICLOUD_TIMELINE_FAN_OUT', default='read')
+
+# Feed representations
+# Cached payloads are keyed by the version of their feed, so they never go stale and only expire to free up memory
+DIGICLOUD_FEED_CACHE_TIMEOUT = timedelta(days=1)
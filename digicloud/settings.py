@@ -2,6 +2,7 @@ from .components.common import *  # noqa: F401
 from .components.django import *  # noqa: F401
 from .components.apps import *  # noqa: F401
 from .components.auth import *  # noqa: F401
+from .components.cache import *  # noqa: F401
 from .components.celery import *  # noqa: F401
 from .components.database import *  # noqa: F401
 from .components.digicloud import *  # noqa: F401